@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Low latency messages for the Quick Mode scripts of Team B
+# A DatagramLink keeps the radio up and listening between messages and
+# a thread moves every frame out of the FIFO as soon as it arrives (woken
+# by the IRQ pin of the radio when it is wired), so a short message costs
+# its frames on the air and little else. Messages of up to MSG_MAX bytes are
+# fragmented and reassembled; reliable ones are acknowledged with a bitmap
+# of the fragments received and only the missing fragments are resent.
+# Date: 19/10/2026
+# Version: 1.0
+
+import os
+import sys
+import threading
+import collections
+import lib_quickmode
+from lib_quickmode import build_frame, parse_frame, read_packet, send_packet
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_datagram")
+    print("")
+
+    exit()
+
+
+# A FRAME_MSG is [message id][fragment index][flags][data ...]
+MSG_PAYLOAD = lib_quickmode.DATA_SIZE - 2
+MSG_MAX_FRAGMENTS = 128
+MSG_MAX = MSG_PAYLOAD * MSG_MAX_FRAGMENTS
+MSG_LAST = 0x01
+MSG_ACK_REQUEST = 0x02
+
+# Seconds a reliable message waits for its FRAME_MSG_ACK, and resends
+MSG_TIMEOUT = 0.05
+MSG_RETRIES = 5
+# Without the IRQ pin the FIFO is polled this often (seconds); with it,
+# this is only the fallback in case an edge is missed
+MSG_POLL = 0.0002
+MSG_IRQ_FALLBACK = 0.01
+# Messages waiting for recv_message(), and messages remembered to answer
+# and drop repeats (delivered) or to finish later (partial)
+MSG_QUEUE = 64
+MSG_REMEMBER = 16
+
+
+class DatagramLink:
+    """ Message oriented link over one radio, for short messages where
+    latency matters more than throughput. The radio stays in RX except
+    while our own frames go out. With the number of the GPIO the IRQ
+    pin of the radio is wired to, the receiving thread sleeps until the
+    radio signals a frame instead of polling it. """
+
+    def __init__(self, radio, irq_pin=None):
+        self.radio = radio
+        self.irq_pin = irq_pin
+        self.lock = threading.Lock()
+        self.ready = threading.Condition()
+        self.wakeup = threading.Event()
+        self.messages = collections.deque(maxlen=MSG_QUEUE)
+        self.acks = dict()
+        self.partial = collections.OrderedDict()
+        self.delivered = collections.OrderedDict()
+        self.next_id = os.urandom(1)[0]
+        self.running = True
+
+        if irq_pin is not None:
+            gpio = radio.GPIO
+            gpio.setup(irq_pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+            gpio.add_event_detect(irq_pin, gpio.FALLING, callback=lambda channel: self.wakeup.set())
+
+        radio.startListening()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        idle = MSG_POLL if self.irq_pin is None else MSG_IRQ_FALLBACK
+        while self.running:
+            self.wakeup.wait(idle)
+            self.wakeup.clear()
+            with self.lock:
+                while self.running and self.radio.available():
+                    frame = parse_frame(read_packet(self.radio))
+                    if frame is not None:
+                        self._handle(*frame)
+
+    def _reply(self, frame):
+        self.radio.stopListening()
+        send_packet(self.radio, frame)
+        self.radio.startListening()
+
+    def _handle(self, frame_type, msg_id, data):
+        """ Deals with one frame, holding the radio lock. """
+
+        if frame_type == lib_quickmode.FRAME_MSG_ACK:
+            with self.ready:
+                self.acks[msg_id] = int.from_bytes(data, 'big')
+                self.ready.notify_all()
+            return
+        if frame_type != lib_quickmode.FRAME_MSG or len(data) < 2:
+            return
+
+        index, flags, payload = data[0], data[1], data[2:]
+        if msg_id in self.delivered:
+            # A repeat: the sender missed our ACK
+            received = (1 << self.delivered[msg_id]) - 1
+        else:
+            fragments, count = self.partial.pop(msg_id, (dict(), None))
+            fragments[index] = payload
+            if flags & MSG_LAST:
+                count = index + 1
+            received = sum(1 << n for n in fragments)
+
+            if count is not None and len(fragments) == count:
+                self.delivered[msg_id] = count
+                if len(self.delivered) > MSG_REMEMBER:
+                    self.delivered.popitem(last=False)
+                with self.ready:
+                    self.messages.append(b''.join(fragments[n] for n in range(count)))
+                    self.ready.notify_all()
+            else:
+                self.partial[msg_id] = (fragments, count)
+                if len(self.partial) > MSG_REMEMBER:
+                    self.partial.popitem(last=False)
+
+        if flags & MSG_ACK_REQUEST:
+            self._reply(build_frame(lib_quickmode.FRAME_MSG_ACK, msg_id, received.to_bytes(MSG_MAX_FRAGMENTS // 8, 'big')))
+
+    def send_message(self, data, reliable=False, timeout=MSG_TIMEOUT, retries=MSG_RETRIES):
+        """ Sends a message of up to MSG_MAX bytes. A reliable message
+        waits for the FRAME_MSG_ACK of the other side and resends the
+        fragments it misses, up to retries times. It returns True if the
+        message went out (and, when reliable, arrived). """
+
+        if len(data) > MSG_MAX:
+            raise Exception("Message of " + str(len(data)) + " bytes, the maximum is " + str(MSG_MAX))
+
+        msg_id = self.next_id
+        self.next_id = (self.next_id + 1) & 0xff
+        fragments = [data[start:start + MSG_PAYLOAD] for start in range(0, max(len(data), 1), MSG_PAYLOAD)]
+        missing = list(range(len(fragments)))
+        for attempt in range(retries + 1 if reliable else 1):
+            with self.ready:
+                self.acks.pop(msg_id, None)
+            with self.lock:
+                self.radio.stopListening()
+                for n, index in enumerate(missing):
+                    flags = MSG_LAST if index == len(fragments) - 1 else 0
+                    if reliable and n == len(missing) - 1:
+                        flags |= MSG_ACK_REQUEST
+                    send_packet(self.radio, build_frame(lib_quickmode.FRAME_MSG, msg_id,
+                                                        bytes((index, flags)) + fragments[index]))
+                self.radio.startListening()
+            if not reliable:
+                return True
+
+            with self.ready:
+                self.ready.wait_for(lambda: msg_id in self.acks, timeout)
+                received = self.acks.pop(msg_id, None)
+            if received is not None:
+                missing = [index for index in range(len(fragments)) if not received >> index & 1]
+                if not missing:
+                    return True
+
+        return False
+
+    def recv_message(self, timeout=None):
+        """ Returns the next message received, or None if none arrives
+        within timeout seconds (None waits for ever). """
+
+        with self.ready:
+            self.ready.wait_for(lambda: self.messages, timeout)
+            if not self.messages:
+                return None
+            return self.messages.popleft()
+
+    def close(self):
+        """ Stops the receiving thread and takes the radio out of RX. """
+
+        self.running = False
+        self.wakeup.set()
+        self.thread.join()
+        if self.irq_pin is not None:
+            self.radio.GPIO.remove_event_detect(self.irq_pin)
+        self.radio.stopListening()
+
+
+def percentiles(samples, points=(0.5, 0.99, 0.999)):
+    """ Returns the given percentiles of a list of samples. """
+
+    samples = sorted(samples)
+    return [samples[min(int(len(samples) * point), len(samples) - 1)] for point in points]
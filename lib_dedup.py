@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Block deduplication for the Quick Mode scripts of Team B
+# The file is cut in fixed blocks: runs of zero blocks are sent as their
+# length, blocks already sent as a reference to the earlier copy (which the
+# receiver reads back from the file it is writing) and only the rest as
+# literal bytes. Disk images and binary logs shrink without a compressor.
+# Date: 19/10/2026
+# Version: 1.0
+
+import os
+import sys
+import struct
+import hashlib
+import collections
+import lib_quickmode
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_dedup")
+    print("")
+
+    exit()
+
+
+DEDUP_MAGIC = b'QMZ1'
+DEDUP_HEADER = struct.Struct('>4sH')
+
+# Operations: `length` literal bytes, `count` blocks repeated from `block` on
+# (block numbers of the output file), or a run of `length` zero bytes
+OP_LITERAL = 0x4c
+OP_REPEAT = 0x52
+OP_ZERO = 0x5a
+LITERAL_OP = struct.Struct('>BH')
+REPEAT_OP = struct.Struct('>BIH')
+ZERO_OP = struct.Struct('>BQ')
+MAX_LITERAL = 0xffff
+MAX_REPEAT = 0xffff
+
+DEDUP_BLOCK = 512
+# Blocks remembered by the sender, the least recently seen are forgotten
+DEDUP_HISTORY = 8192
+
+_ZEROS = bytes(65536)
+# Stands for a block of zeros where a block number is expected
+_ZERO_BLOCK = -1
+
+
+def _literal_ops(view):
+    """ Splits literal bytes into as many OP_LITERAL as needed, the data
+    going out as slices of the view. """
+
+    for start in range(0, len(view), MAX_LITERAL):
+        piece = view[start:start + MAX_LITERAL]
+        yield LITERAL_OP.pack(OP_LITERAL, len(piece))
+        yield piece
+
+
+def build_dedup(file_path, block_size=DEDUP_BLOCK, history=DEDUP_HISTORY):
+    """ Generator that yields the file as a dedup stream: a header with
+    the block size, then the literal, repeat and zero operations that
+    rebuild it. Literal data are memoryview slices of the mapped file. """
+
+    view = lib_quickmode.mapped_file(file_path)
+    yield DEDUP_HEADER.pack(DEDUP_MAGIC, block_size)
+
+    zero = memoryview(bytes(block_size))
+    index = collections.OrderedDict()
+    literal_start = None
+    zero_run = 0
+    repeat_start = None
+    repeat_count = 0
+    for block, offset in enumerate(range(0, len(view), block_size)):
+        data = view[offset:offset + block_size]
+        match = None
+        if data == zero[:len(data)]:
+            match = _ZERO_BLOCK
+        elif len(data) == block_size:
+            key = hashlib.md5(data).digest()
+            match = index.get(key)
+            if match is not None and view[match * block_size:(match + 1) * block_size] == data:
+                index.move_to_end(key)
+            else:
+                match = None
+                index[key] = block
+                if len(index) > history:
+                    index.popitem(last=False)
+
+        # Close the pending operation unless this block extends it
+        if zero_run and match != _ZERO_BLOCK:
+            yield ZERO_OP.pack(OP_ZERO, zero_run)
+            zero_run = 0
+        if repeat_count and (match is None or match != repeat_start + repeat_count or repeat_count == MAX_REPEAT):
+            yield REPEAT_OP.pack(OP_REPEAT, repeat_start, repeat_count)
+            repeat_count = 0
+        if literal_start is not None and match is not None:
+            for op in _literal_ops(view[literal_start:offset]):
+                yield op
+            literal_start = None
+
+        if match is None:
+            if literal_start is None:
+                literal_start = offset
+        elif match == _ZERO_BLOCK:
+            zero_run += len(data)
+        elif repeat_count:
+            repeat_count += 1
+        else:
+            repeat_start = match
+            repeat_count = 1
+
+    if literal_start is not None:
+        for op in _literal_ops(view[literal_start:]):
+            yield op
+    if zero_run:
+        yield ZERO_OP.pack(OP_ZERO, zero_run)
+    if repeat_count:
+        yield REPEAT_OP.pack(OP_REPEAT, repeat_start, repeat_count)
+
+
+class DedupWriter:
+    """ Receives the dedup stream produced by build_dedup() piece by
+    piece and writes the file into f, which must be open for reading
+    too: repeated blocks are read back from it. Zero runs are skipped
+    with a seek, so they stay holes in the file. """
+
+    def __init__(self, f):
+        self.out = f
+        self.digest = hashlib.md5()
+        self.position = 0
+        self.pending = b''
+        self.block_size = None
+        self.literal_left = 0
+        self.literal = 0
+        self.repeated = 0
+        self.zeros = 0
+
+    def _write(self, data):
+        self.out.write(data)
+        self.digest.update(data)
+        self.position += len(data)
+
+    def feed(self, data):
+        """ Adds the next piece of the dedup stream. """
+
+        self.pending += data
+        if self.block_size is None:
+            if len(self.pending) < DEDUP_HEADER.size:
+                return
+            magic, self.block_size = DEDUP_HEADER.unpack_from(self.pending, 0)
+            if magic != DEDUP_MAGIC:
+                raise Exception("Not a dedup stream")
+            self.pending = self.pending[DEDUP_HEADER.size:]
+
+        while self.pending:
+            if self.literal_left:
+                piece = self.pending[:self.literal_left]
+                self.pending = self.pending[len(piece):]
+                self.literal_left -= len(piece)
+                self.literal += len(piece)
+                self._write(piece)
+            elif self.pending[0] == OP_LITERAL:
+                if len(self.pending) < LITERAL_OP.size:
+                    return
+                op, self.literal_left = LITERAL_OP.unpack_from(self.pending, 0)
+                self.pending = self.pending[LITERAL_OP.size:]
+            elif self.pending[0] == OP_REPEAT:
+                if len(self.pending) < REPEAT_OP.size:
+                    return
+                op, block, count = REPEAT_OP.unpack_from(self.pending, 0)
+                self.pending = self.pending[REPEAT_OP.size:]
+                self.out.seek(block * self.block_size)
+                data = self.out.read(count * self.block_size)
+                self.out.seek(self.position)
+                self.repeated += len(data)
+                self._write(data)
+            elif self.pending[0] == OP_ZERO:
+                if len(self.pending) < ZERO_OP.size:
+                    return
+                op, length = ZERO_OP.unpack_from(self.pending, 0)
+                self.pending = self.pending[ZERO_OP.size:]
+                self.out.seek(length, os.SEEK_CUR)
+                self.position += length
+                self.zeros += length
+                for start in range(0, length, len(_ZEROS)):
+                    self.digest.update(_ZEROS[:min(len(_ZEROS), length - start)])
+            else:
+                raise Exception("Unknown dedup operation")
+
+    def finish(self):
+        """ Sets the length of the file (a zero run at the end is only a
+        seek so far) and returns (size, MD5 digest) of what was written. """
+
+        self.out.truncate(self.position)
+        return self.position, self.digest.digest()
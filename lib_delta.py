@@ -0,0 +1,250 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Delta (rsync-style) encoding for the Quick Mode scripts of Team B
+# The receiver describes the copy it already has with one rolling and one
+# strong checksum per block, the sender answers with the new file written
+# as references to those blocks plus the literal bytes that changed.
+# Date: 19/10/2026
+# Version: 1.0
+
+import os
+import sys
+import math
+import struct
+import hashlib
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_delta")
+    print("")
+
+    exit()
+
+
+SIGNATURE_MAGIC = b'QMS1'
+SIGNATURE_HEADER = struct.Struct('>4sIQ')
+SIGNATURE_BLOCK = struct.Struct('>I8s')
+
+DELTA_MAGIC = b'QMD1'
+DELTA_HEADER = struct.Struct('>4sQ16s')
+
+# Delta operations: copy `count` blocks starting at `block`, or `length` literal bytes
+OP_COPY = 0x43
+OP_LITERAL = 0x4c
+COPY_OP = struct.Struct('>BII')
+LITERAL_OP = struct.Struct('>BH')
+MAX_LITERAL = 0xffff
+
+MIN_BLOCK_SIZE = 64
+MAX_BLOCK_SIZE = 4096
+
+
+def choose_block_size(file_size):
+    """ Picks the block size like rsync does, around the square root
+    of the file size, so signatures stay small on the slow link. """
+
+    block_size = int(math.sqrt(file_size)) & ~0xf
+    return min(max(block_size, MIN_BLOCK_SIZE), MAX_BLOCK_SIZE)
+
+
+def weak_checksum(block):
+    """ Rolling checksum of a block, the two 16 bit sums of rsync. """
+
+    a = 0
+    b = 0
+    size = len(block)
+    for i, x in enumerate(block):
+        a += x
+        b += (size - i) * x
+
+    return a & 0xffff, b & 0xffff
+
+
+def strong_checksum(block):
+    """ Strong checksum used to confirm a rolling checksum match. """
+
+    return hashlib.md5(block).digest()[:8]
+
+
+def build_signature(file_path):
+    """ Builds the signature of the copy the receiver already has:
+    the block size, the file size and both checksums of every full block.
+    A missing file gets an empty signature, so everything is sent. """
+
+    if not os.path.isfile(file_path):
+        return SIGNATURE_HEADER.pack(SIGNATURE_MAGIC, MIN_BLOCK_SIZE, 0)
+
+    file_size = os.path.getsize(file_path)
+    block_size = choose_block_size(file_size)
+    signature = [SIGNATURE_HEADER.pack(SIGNATURE_MAGIC, block_size, file_size)]
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if len(block) < block_size:
+                break
+            a, b = weak_checksum(block)
+            signature.append(SIGNATURE_BLOCK.pack(a | b << 16, strong_checksum(block)))
+
+    return b''.join(signature)
+
+
+def parse_signature(signature):
+    """ Turns a signature into (block_size, index), where index maps every
+    rolling checksum to a {strong checksum: block number} dictionary. """
+
+    magic, block_size, file_size = SIGNATURE_HEADER.unpack_from(signature, 0)
+    if magic != SIGNATURE_MAGIC:
+        raise Exception("Not a delta signature")
+
+    index = dict()
+    offset = SIGNATURE_HEADER.size
+    block = 0
+    while offset + SIGNATURE_BLOCK.size <= len(signature):
+        weak, strong = SIGNATURE_BLOCK.unpack_from(signature, offset)
+        index.setdefault(weak, dict()).setdefault(strong, block)
+        offset += SIGNATURE_BLOCK.size
+        block += 1
+
+    return block_size, index
+
+
+def _literal_ops(data):
+    """ Splits literal bytes into as many OP_LITERAL as needed. """
+
+    for start in range(0, len(data), MAX_LITERAL):
+        piece = data[start:start + MAX_LITERAL]
+        yield LITERAL_OP.pack(OP_LITERAL, len(piece))
+        yield piece
+
+
+def build_delta(file_path, signature):
+    """ Generator that yields the delta of the new file against the
+    signature of the old one: a header with the size and MD5 of the new
+    file, then the copy and literal operations that rebuild it. """
+
+    block_size, index = parse_signature(signature)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    yield DELTA_HEADER.pack(DELTA_MAGIC, len(data), hashlib.md5(data).digest())
+
+    size = len(data)
+    literal_start = 0
+    copy_start = None
+    copy_count = 0
+    i = 0
+    a = b = None
+    while index and i + block_size <= size:
+        if a is None:
+            a, b = weak_checksum(data[i:i + block_size])
+
+        match = None
+        candidates = index.get(a | b << 16)
+        if candidates:
+            match = candidates.get(strong_checksum(data[i:i + block_size]))
+
+        if match is not None:
+            if literal_start < i:
+                if copy_count:
+                    yield COPY_OP.pack(OP_COPY, copy_start, copy_count)
+                    copy_count = 0
+                for op in _literal_ops(data[literal_start:i]):
+                    yield op
+            if copy_count and copy_start + copy_count == match:
+                copy_count += 1
+            else:
+                if copy_count:
+                    yield COPY_OP.pack(OP_COPY, copy_start, copy_count)
+                copy_start = match
+                copy_count = 1
+            i += block_size
+            literal_start = i
+            a = None
+            continue
+
+        # Roll the checksum one byte forward
+        if i + block_size < size:
+            old = data[i]
+            a = (a - old + data[i + block_size]) & 0xffff
+            b = (b - block_size * old + a) & 0xffff
+        i += 1
+
+    if copy_count:
+        yield COPY_OP.pack(OP_COPY, copy_start, copy_count)
+    for op in _literal_ops(data[literal_start:]):
+        yield op
+
+
+class DeltaWriter:
+    """ Receives the delta produced by build_delta() piece by piece and
+    rebuilds the new file next to the old one, replacing it only once
+    the MD5 of the result matches. """
+
+    def __init__(self, file_path, block_size):
+        self.file_path = file_path
+        self.block_size = block_size
+        self.tmp_path = file_path + '.delta'
+        self.old = open(file_path, 'rb') if os.path.isfile(file_path) else None
+        self.out = open(self.tmp_path, 'wb')
+        self.digest = hashlib.md5()
+        self.pending = b''
+        self.header = None
+        self.literal_left = 0
+        self.copied = 0
+        self.literal = 0
+
+    def _write(self, data):
+        self.out.write(data)
+        self.digest.update(data)
+
+    def feed(self, data):
+        """ Adds the next piece of the delta stream. """
+
+        self.pending += data
+        if self.header is None:
+            if len(self.pending) < DELTA_HEADER.size:
+                return
+            magic, size, digest = DELTA_HEADER.unpack_from(self.pending, 0)
+            if magic != DELTA_MAGIC:
+                raise Exception("Not a delta stream")
+            self.header = (size, digest)
+            self.pending = self.pending[DELTA_HEADER.size:]
+
+        while self.pending:
+            if self.literal_left:
+                piece = self.pending[:self.literal_left]
+                self.pending = self.pending[len(piece):]
+                self.literal_left -= len(piece)
+                self.literal += len(piece)
+                self._write(piece)
+            elif self.pending[0] == OP_COPY:
+                if len(self.pending) < COPY_OP.size:
+                    return
+                op, block, count = COPY_OP.unpack_from(self.pending, 0)
+                self.pending = self.pending[COPY_OP.size:]
+                self.old.seek(block * self.block_size)
+                self._write(self.old.read(count * self.block_size))
+                self.copied += count * self.block_size
+            elif self.pending[0] == OP_LITERAL:
+                if len(self.pending) < LITERAL_OP.size:
+                    return
+                op, self.literal_left = LITERAL_OP.unpack_from(self.pending, 0)
+                self.pending = self.pending[LITERAL_OP.size:]
+            else:
+                raise Exception("Unknown delta operation")
+
+    def finish(self):
+        """ Closes the rebuilt file and puts it in place of the old one.
+        It returns True if the MD5 of the result is the expected one. """
+
+        self.out.close()
+        if self.old:
+            self.old.close()
+
+        if self.header is None or self.digest.digest() != self.header[1]:
+            os.remove(self.tmp_path)
+            return False
+
+        os.replace(self.tmp_path, self.file_path)
+        return True
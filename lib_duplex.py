@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Bidirectional transfers for the Quick Mode scripts of Team B
+# Both ends send a stream at the same time over the one radio pair. They take
+# turns: in its turn a side sends a burst of up to DUPLEX_BURST data frames
+# and the last one hands the turn over. Every frame carries the next frame
+# expected from the other side, so each burst also acknowledges what the
+# other side sent in its own turn. A side with nothing left to send passes
+# its turn with a single empty frame, so the other stream gets the channel.
+# Date: 19/10/2026
+# Version: 1.0
+
+import sys
+import time
+import struct
+import collections
+import lib_quickmode
+from lib_quickmode import build_frame, parse_frame, read_packet, send_packet, wait_for_data
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_duplex")
+    print("")
+
+    exit()
+
+
+# A FRAME_DUPLEX is [type][seq][next seq expected from the other side][flags][data ...]
+DUPLEX_HEADER = struct.Struct('>BB')
+DUPLEX_DATA_SIZE = lib_quickmode.DATA_SIZE - DUPLEX_HEADER.size
+DUPLEX_TURN = 0x01
+DUPLEX_EMPTY = 0x02
+DUPLEX_END = 0x04
+
+# Data frames per turn; the same for both sides, so they share the channel evenly
+DUPLEX_BURST = 16
+# Times the initiator sends its last frame without an answer before it stops;
+# the other side answers for as long as those take, DUPLEX_LINGER seconds at most
+DUPLEX_FINAL_ATTEMPTS = 4
+DUPLEX_LINGER = 0.5
+
+
+class Duplex:
+    """ One side of a bidirectional transfer: it sends chunks (of up to
+    DUPLEX_DATA_SIZE bytes) while it receives the stream of the other
+    side. The initiator sends first and takes the turn back when the
+    other side's turn is lost (after the LinkStats timeout); the other
+    side only sends when it is handed the turn. Lost frames are sent
+    again in the next turn, from the first one not acknowledged. """
+
+    def __init__(self, radio, chunks, initiator, burst=DUPLEX_BURST, stats=None):
+        self.radio = radio
+        self.chunks = iter(chunks)
+        self.initiator = initiator
+        self.burst = burst
+        self.stats = stats
+        self.pending = collections.OrderedDict()
+        self.base = 0
+        self.top = 0
+        self.more = True
+        self.expected = 0
+        self.peer_done = False
+        self.sent = 0
+        self.turns = 0
+        # Our whole stream acknowledged and the other one received to the end
+        self.complete = False
+
+    def _timeout(self):
+        return self.stats.timeout() if self.stats else lib_quickmode.ACK_TIMEOUT
+
+    def _done(self):
+        return not self.more and not self.pending
+
+    def _final_frame(self):
+        return build_frame(lib_quickmode.FRAME_DUPLEX, self.top,
+                           DUPLEX_HEADER.pack(self.expected & 0xff, DUPLEX_TURN | DUPLEX_EMPTY | DUPLEX_END))
+
+    def _send_turn(self):
+        """ Sends our burst, or an empty frame that only passes the turn
+        and acknowledges. It returns the numbers of the data frames sent. """
+
+        # Shorter bursts when the LinkStats sees losses, as the SACK sender does
+        burst = min(self.stats.window(lib_quickmode.SACK_MIN_BURST, self.burst), self.burst) if self.stats else self.burst
+        while self.more and len(self.pending) < burst:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.more = False
+            else:
+                self.pending[self.top] = bytes(chunk)
+                self.top += 1
+
+        numbers = list(self.pending)[:burst]
+        for i, number in enumerate(numbers):
+            flags = DUPLEX_TURN if i == len(numbers) - 1 else 0
+            send_packet(self.radio, build_frame(lib_quickmode.FRAME_DUPLEX, number,
+                                                DUPLEX_HEADER.pack(self.expected & 0xff, flags) + self.pending[number]))
+        if numbers:
+            self.sent += len(numbers)
+        elif self._done():
+            send_packet(self.radio, self._final_frame())
+        else:
+            send_packet(self.radio, build_frame(lib_quickmode.FRAME_DUPLEX, self.top,
+                                                DUPLEX_HEADER.pack(self.expected & 0xff, DUPLEX_TURN | DUPLEX_EMPTY)))
+        self.turns += 1
+
+        return numbers
+
+    def _on_frame(self, seq, ack, flags, data, delivered):
+        """ Takes the acknowledgement a frame carries and its data, if it
+        is the next one of the other stream. """
+
+        acked = self.base + ((ack - self.base) & 0xff)
+        if acked <= self.top:
+            for number in range(self.base, acked):
+                self.pending.pop(number, None)
+            self.base = max(self.base, acked)
+
+        if seq != self.expected & 0xff:
+            return
+        if flags & DUPLEX_EMPTY:
+            if flags & DUPLEX_END:
+                self.peer_done = True
+        else:
+            self.expected += 1
+            delivered.append(data)
+
+    def _listen_turn(self):
+        """ Receives the turn of the other side. It returns (the data
+        delivered, whether the turn came back to us, when the first frame
+        arrived). """
+
+        delivered = list()
+        first_at = None
+        self.radio.startListening()
+        while wait_for_data(self.radio, self._timeout()):
+            frame = parse_frame(read_packet(self.radio))
+            if frame is None or frame[0] != lib_quickmode.FRAME_DUPLEX or len(frame[2]) < DUPLEX_HEADER.size:
+                continue
+            if first_at is None:
+                first_at = time.time()
+            ack, flags = DUPLEX_HEADER.unpack_from(frame[2], 0)
+            self._on_frame(frame[1], ack, flags, frame[2][DUPLEX_HEADER.size:], delivered)
+            if flags & DUPLEX_TURN:
+                self.radio.stopListening()
+                return delivered, True, first_at
+        self.radio.stopListening()
+
+        return delivered, False, first_at
+
+    def _linger(self):
+        """ Once both streams are through, answers every turn the other
+        side hands us with our last frame, so it gets our acknowledgement
+        too. The initiator repeats its last frame until the final frame
+        of the other side arrives. """
+
+        final = self._final_frame()
+        linger = min(DUPLEX_FINAL_ATTEMPTS * self._timeout(), DUPLEX_LINGER)
+        attempts = 1
+        self.radio.startListening()
+        while True:
+            if not wait_for_data(self.radio, self._timeout() if self.initiator else linger):
+                if not self.initiator or attempts >= DUPLEX_FINAL_ATTEMPTS:
+                    break
+                self.radio.stopListening()
+                send_packet(self.radio, final)
+                self.radio.startListening()
+                attempts += 1
+                continue
+
+            frame = parse_frame(read_packet(self.radio))
+            if frame is None or frame[0] != lib_quickmode.FRAME_DUPLEX or len(frame[2]) < DUPLEX_HEADER.size:
+                continue
+            ack, flags = DUPLEX_HEADER.unpack_from(frame[2], 0)
+            if self.initiator and flags & DUPLEX_END and ack == self.top & 0xff:
+                # The other side is done and has our last acknowledgement
+                break
+            if flags & DUPLEX_TURN:
+                self.radio.stopListening()
+                send_packet(self.radio, final)
+                self.radio.startListening()
+        self.radio.stopListening()
+
+    def exchange(self):
+        """ Generator that runs the transfer and yields the data of the
+        other stream in order. It ends when both streams are through,
+        with complete set; the initiator also ends when the other side
+        stops answering after its last frame. """
+
+        my_turn = self.initiator
+        numbers = list()
+        sent_at = time.time()
+        while True:
+            if my_turn:
+                numbers = self._send_turn()
+                if self._done() and self.peer_done:
+                    self.complete = True
+                    self._linger()
+                    return
+                sent_at = time.time()
+
+            delivered, my_turn, first_at = self._listen_turn()
+            if self.stats and first_at is not None and numbers:
+                self.stats.on_rtt(first_at - sent_at)
+            if self.stats:
+                for number in numbers:
+                    self.stats.on_attempt(number < self.base, False, DUPLEX_DATA_SIZE)
+            numbers = list()
+            for data in delivered:
+                yield data
+
+            # Only the initiator takes the turn back when the other one is lost
+            my_turn = my_turn or self.initiator
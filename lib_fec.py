@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Forward error correction for the Quick Mode scripts of Team B
+# Systematic Reed-Solomon style erasure code over GF(256): a block of k data
+# frames is followed by parity frames, and any k good frames of the block
+# rebuild the data. Parity row p combines the data frames with the Cauchy
+# coefficients 1 / (p + i), so any k rows can always be solved.
+# Date: 19/10/2026
+# Version: 1.0
+
+import sys
+import math
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_fec")
+    print("")
+
+    exit()
+
+
+# Loss estimates below this are a clean link: the averages of the LinkStats
+# only tend to 0, they never reach it
+FEC_MIN_LOSS = 1e-3
+
+# GF(256) with the polynomial x^8 + x^4 + x^3 + x^2 + 1
+_EXP = [0] * 512
+_LOG = [0] * 256
+
+_x = 1
+for _i in range(255):
+    _EXP[_i] = _x
+    _LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11d
+for _i in range(255, 512):
+    _EXP[_i] = _EXP[_i - 255]
+
+
+def gf_mul(a, b):
+    """ Product of two GF(256) elements. """
+
+    if a == 0 or b == 0:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+def gf_inv(a):
+    """ Multiplicative inverse of a non zero GF(256) element. """
+
+    return _EXP[255 - _LOG[a]]
+
+
+# One bytes.translate() table per coefficient multiplies a whole frame at once
+_MUL_TABLES = [bytes(gf_mul(c, x) for x in range(256)) for c in range(256)]
+
+
+def _scale(c, data):
+    """ Multiplies every byte of data by c, as an int for fast XOR. """
+
+    return int.from_bytes(data.translate(_MUL_TABLES[c]), 'big')
+
+
+def coefficient(index, i):
+    """ Coefficient of data frame i in the parity frame with the given
+    index (index >= k > i, so they never cancel). """
+
+    return gf_inv(index ^ i)
+
+
+def parity(data, index):
+    """ Builds the parity frame with the given index (>= len(data)) for
+    the data frames of a block, all of the same length. """
+
+    acc = 0
+    for i, frame in enumerate(data):
+        acc ^= _scale(coefficient(index, i), frame)
+
+    return acc.to_bytes(len(data[0]), 'big')
+
+
+def decode(frames, k, size):
+    """ Rebuilds the k data frames of a block from any k of its frames.
+    frames maps frame index to payload (size bytes). It returns the list
+    of data frames, or None if there are fewer than k frames. """
+
+    if len(frames) < k:
+        return None
+
+    data = [frames.get(i) for i in range(k)]
+    lost = [i for i in range(k) if data[i] is None]
+    if not lost:
+        return data
+
+    # Take the parity out of the frames we have: what is left only
+    # depends on the lost data frames
+    rows = list()
+    for index in sorted(index for index in frames if index >= k)[:len(lost)]:
+        acc = int.from_bytes(frames[index], 'big')
+        for i in range(k):
+            if data[i] is not None:
+                acc ^= _scale(coefficient(index, i), data[i])
+        rows.append([coefficient(index, i) for i in lost] + [acc])
+
+    # Gauss-Jordan elimination, the right hand sides are whole frames
+    n = len(lost)
+    for col in range(n):
+        pivot = next(row for row in range(col, n) if rows[row][col])
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        inv = gf_inv(rows[col][col])
+        rows[col] = [gf_mul(inv, c) for c in rows[col][:n]] + [_scale(inv, rows[col][n].to_bytes(size, 'big'))]
+        for row in range(n):
+            factor = rows[row][col]
+            if row != col and factor:
+                rows[row] = [c ^ gf_mul(factor, p) for c, p in zip(rows[row][:n], rows[col][:n])] + \
+                            [rows[row][n] ^ _scale(factor, rows[col][n].to_bytes(size, 'big'))]
+
+    for row, i in enumerate(lost):
+        data[i] = rows[row][n].to_bytes(size, 'big')
+
+    return data
+
+
+def parity_count(k, loss, margin=1.64, maximum=16):
+    """ Number of parity frames for a block of k frames so that, with the
+    given frame loss rate, at least k frames arrive in most blocks: the
+    expected losses plus margin standard deviations. """
+
+    if loss < FEC_MIN_LOSS:
+        return 0
+
+    loss = min(loss, 0.9)
+    expected = k * loss + margin * math.sqrt(k * loss * (1 - loss))
+    return min(int(math.ceil(expected / (1 - loss))), maximum)
@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Encoded frame cache for the Quick Mode scripts of Team B
+# The frames of a file, once encoded (codec, header and CRC), are kept on disk
+# under the MD5 of the file and the encoding, in fixed 32 byte slots that are
+# mapped back into memory. Sending the same file again takes its frames
+# straight from the cache, without reading the file or computing anything.
+# Date: 19/10/2026
+# Version: 1.0
+
+import os
+import sys
+import glob
+import struct
+import hashlib
+import lib_quickmode
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_framecache")
+    print("")
+
+    exit()
+
+
+CACHE_DIR = os.path.expanduser('~/.cache/quickmode')
+# Bytes the cache may take; the entries used least recently go first
+CACHE_LIMIT = 256 * 1024 * 1024
+
+# [magic][frames][length of the last frame], then one slot per frame
+CACHE_MAGIC = b'QMF1'
+CACHE_HEADER = struct.Struct('>4sQB')
+CACHE_FRAMES = '.qmf'
+# MD5 of a file, found by its path, size, mtime and inode
+CACHE_DIGEST = '.md5'
+
+
+class FrameCache:
+    """ Directory of encoded frame streams. An entry holds the FRAME_DATA
+    frames of a stream, numbered from 0, and is named after the MD5 of
+    the file and of the encoding parameters. Every use of an entry
+    touches its mtime, which is the order of the LRU eviction. """
+
+    def __init__(self, directory=CACHE_DIR, limit=CACHE_LIMIT):
+        self.directory = directory
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, hashlib.md5(repr(key).encode()).hexdigest() + suffix)
+
+    def digest(self, file_path):
+        """ Returns the MD5 digest of the file, computed only the first
+        time the file is seen as it is now. """
+
+        st = os.stat(file_path)
+        path = self._path((os.path.realpath(file_path), st.st_size, st.st_mtime_ns, st.st_ino), CACHE_DIGEST)
+        try:
+            with open(path, 'rb') as f:
+                digest = f.read()
+            if len(digest) == 16:
+                os.utime(path)
+                return digest
+        except OSError:
+            pass
+
+        digest = lib_quickmode.file_digest(file_path)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(digest)
+        os.replace(path + '.tmp', path)
+
+        return digest
+
+    def frames(self, digest, encoding, chunks):
+        """ Returns the frames of the stream of the file with this digest
+        encoded with the given parameters (a tuple). On a miss chunks() is
+        called for the data of the stream, and the frames are built and
+        stored as they are used; the entry only appears once the stream
+        has been read to the end. """
+
+        path = self._path((digest, encoding, lib_quickmode.FRAME_SIZE), CACHE_FRAMES)
+        try:
+            view = lib_quickmode.mapped_file(path)
+            magic, count, last = CACHE_HEADER.unpack_from(view, 0)
+            if magic == CACHE_MAGIC and len(view) == CACHE_HEADER.size + count * lib_quickmode.FRAME_SIZE:
+                os.utime(path)
+                self.hits += 1
+                return _slots(view, count, last)
+        except (OSError, struct.error):
+            pass
+
+        self.misses += 1
+        return self._store(path, chunks())
+
+    def _store(self, path, chunks):
+        """ Generator that builds the frames of chunks, yields them and
+        writes them into a new entry at path. """
+
+        temporary = path + '.' + str(os.getpid()) + '.tmp'
+        count = 0
+        length = 0
+        slot = bytearray(lib_quickmode.FRAME_SIZE)
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, 0, 0))
+                for chunk in chunks:
+                    frame = lib_quickmode.build_frame(lib_quickmode.FRAME_DATA, count, chunk)
+                    slot[:len(frame)] = frame
+                    slot[len(frame):] = bytes(lib_quickmode.FRAME_SIZE - len(frame))
+                    f.write(slot)
+                    count += 1
+                    length = len(frame)
+                    yield frame
+                f.seek(0)
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, count, length))
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+        self.evict()
+
+    def evict(self):
+        """ Removes the entries used least recently until the cache fits
+        in its limit again. """
+
+        entries = list()
+        for path in glob.glob(os.path.join(self.directory, '*' + CACHE_FRAMES)) + \
+                glob.glob(os.path.join(self.directory, '*' + CACHE_DIGEST)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def _slots(view, count, last):
+    """ Generator over the frames of a mapped entry, as views of it. """
+
+    size = lib_quickmode.FRAME_SIZE
+    for n in range(count):
+        offset = CACHE_HEADER.size + n * size
+        yield view[offset:offset + (last if n == count - 1 else size)]
@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Link quality estimation for the Quick Mode scripts of Team B
+# LinkStats follows the outcome of every transmission (delivered, lost,
+# reported corrupted, round trip time) and, every few transmissions, the
+# OBSERVE_TX and RPD registers of the radio. It keeps exponentially weighted
+# estimates of all of them, so the transfer modes can size their timeouts,
+# windows and FEC parity from the real conditions of the link.
+# Date: 19/10/2026
+# Version: 1.0
+
+import sys
+import time
+import lib_fec
+from lib_nrf24 import NRF24
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_linkstats")
+    print("")
+
+    exit()
+
+
+# Weight of a new observation in the delivery, CRC and register estimates
+LINK_ALPHA = 0.05
+# Round trip time estimation and timeout as in TCP (RFC 6298)
+RTT_ALPHA = 0.125
+RTT_BETA = 0.25
+RTT_K = 4
+# Transmissions between two reads of the radio registers (each read is a SPI transfer)
+SAMPLE_EVERY = 16
+
+
+class LinkStats:
+    """ Exponentially weighted estimates of the quality of the link.
+
+    The transfer modes report every transmission with on_attempt(), or
+    a whole block with on_block(), and receivers report every frame with
+    on_frame(). The estimates are
+    plain attributes:
+
+    delivery    share of transmissions answered by the other side
+    crc         share of transmissions reported as corrupted
+    rtt         round trip time in seconds, rtt_var its deviation
+    goodput     delivered payload bytes per second
+    retries     auto-ack retransmissions per packet (ARC_CNT)
+    lost        packets lost by auto-ack per register sample (PLOS_CNT)
+    rpd         share of samples with a received power above -64dBm
+
+    and timeout(), window() and parity() turn them into protocol
+    parameters. With no radio the registers are not sampled. """
+
+    def __init__(self, radio=None, initial_loss=0.1, initial_timeout=1.0, min_timeout=0.01):
+        self.radio = radio
+        self.delivery = 1.0 - initial_loss
+        self.crc = 0.0
+        self.rtt = None
+        self.rtt_var = 0.0
+        self.goodput = 0.0
+        self.retries = 0.0
+        self.lost = 0.0
+        self.rpd = 0.0
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.attempts = 0
+        self.frames = 0
+        self.bad_frames = 0
+        self.delivered_bytes = 0
+        self._last_plos = 0
+        self._since = time.time()
+        self._bytes_since = 0
+
+    def _average(self, value, sample, alpha=LINK_ALPHA):
+        return value + alpha * (sample - value)
+
+    def on_attempt(self, acked, nak, length, rtt=None):
+        """ Records the outcome of one transmission of length payload
+        bytes and, when known, the time its answer took. """
+
+        self.attempts += 1
+        self.delivery = self._average(self.delivery, 1.0 if acked else 0.0)
+        self.crc = self._average(self.crc, 1.0 if nak else 0.0)
+        if acked:
+            self.delivered_bytes += length
+            self._bytes_since += length
+            if rtt is not None:
+                self.on_rtt(rtt)
+
+        if self.attempts % SAMPLE_EVERY == 0:
+            self.sample()
+
+    def on_block(self, sent, received, length):
+        """ Records sent transmissions of length payload bytes, of which
+        the other side reports received without saying which ones. It is
+        one observation, weighted like sent outcomes in a row. """
+
+        if not sent:
+            return
+        before = self.attempts
+        self.attempts += sent
+        self.delivery = self._average(self.delivery, received / float(sent), 1.0 - (1.0 - LINK_ALPHA) ** sent)
+        self.delivered_bytes += received * length
+        self._bytes_since += received * length
+
+        if self.attempts // SAMPLE_EVERY != before // SAMPLE_EVERY:
+            self.sample()
+
+    def on_frame(self, good, length=0):
+        """ Records a frame seen by a receiver, good or failing its CRC,
+        with length payload bytes. """
+
+        self.frames += 1
+        if good:
+            self.delivered_bytes += length
+            self._bytes_since += length
+        else:
+            self.bad_frames += 1
+        self.crc = self._average(self.crc, 0.0 if good else 1.0)
+
+        if self.frames % SAMPLE_EVERY == 0:
+            self.sample()
+
+    def on_rtt(self, rtt):
+        """ Records one round trip time measurement, in seconds. """
+
+        if self.rtt is None:
+            self.rtt = rtt
+            self.rtt_var = rtt / 2
+        else:
+            self.rtt_var += RTT_BETA * (abs(self.rtt - rtt) - self.rtt_var)
+            self.rtt += RTT_ALPHA * (rtt - self.rtt)
+
+    def sample(self):
+        """ Reads OBSERVE_TX and RPD from the radio and updates the
+        goodput. Called every SAMPLE_EVERY transmissions. """
+
+        now = time.time()
+        elapsed = now - self._since
+        if elapsed > 0:
+            self.goodput = self._average(self.goodput, self._bytes_since / elapsed, 0.25)
+        self._since = now
+        self._bytes_since = 0
+
+        if self.radio is None:
+            return
+
+        observe = self.radio.read_register(NRF24.OBSERVE_TX)
+        plos = observe >> NRF24.PLOS_CNT
+        # Writing RF_CH (a channel change) clears the counter
+        lost = plos - self._last_plos if plos >= self._last_plos else plos
+        self._last_plos = plos
+        self.retries = self._average(self.retries, observe & 0x0f)
+        self.lost = self._average(self.lost, lost)
+        self.rpd = self._average(self.rpd, self.radio.testRPD())
+
+    def loss(self):
+        """ Estimated share of transmissions that are not answered. """
+
+        return 1.0 - self.delivery
+
+    def timeout(self):
+        """ Time to wait for an answer before resending: the smoothed
+        round trip time plus RTT_K deviations, like TCP. """
+
+        if self.rtt is None:
+            return self.initial_timeout
+
+        return min(max(self.rtt + RTT_K * self.rtt_var, self.min_timeout), self.initial_timeout)
+
+    def window(self, minimum, maximum):
+        """ Frames that can go out before the next report from the other
+        side: about the number expected before the first loss. """
+
+        loss = self.loss()
+        if loss <= 0:
+            return maximum
+
+        return int(min(max(1.0 / loss, minimum), maximum))
+
+    def parity(self, k, margin=1.64, maximum=16):
+        """ Parity frames for a block of k frames so that at least k arrive
+        in most blocks: the expected losses plus margin deviations. """
+
+        return lib_fec.parity_count(k, self.loss(), margin, maximum)
+
+    def snapshot(self):
+        """ Returns the current estimates as a dictionary. """
+
+        return {'delivery': self.delivery, 'crc': self.crc, 'rtt': self.rtt, 'rtt_var': self.rtt_var,
+                'timeout': self.timeout(), 'goodput': self.goodput, 'retries': self.retries,
+                'lost': self.lost, 'rpd': self.rpd, 'attempts': self.attempts, 'frames': self.frames,
+                'bad_frames': self.bad_frames, 'delivered_bytes': self.delivered_bytes}
+
+    def summary(self):
+        """ One line description of the link, for the end of a transfer. """
+
+        parts = list()
+        if self.attempts:
+            parts.append("delivery %.3f" % self.delivery)
+        parts.append("CRC failures %.3f" % self.crc)
+        if self.rtt is not None:
+            parts.append("RTT %.1f ms" % (self.rtt * 1000))
+        parts.append("goodput %.0f B/s" % self.goodput)
+        parts.append("RPD %.2f" % self.rpd)
+        parts.append("retries %.2f" % self.retries)
+
+        return "Link: " + ", ".join(parts)
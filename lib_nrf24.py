@@ -26,6 +26,7 @@
 
 import sys
 import time
+import lib_timing
 
 if __name__ == '__main__':
     print (sys.argv[0], 'is an importable module:')
@@ -177,6 +178,13 @@ class NRF24:
     child_payload_size = [RX_PW_P0, RX_PW_P1, RX_PW_P2, RX_PW_P3, RX_PW_P4, RX_PW_P5]
     child_pipe_enable = [ERX_P0, ERX_P1, ERX_P2, ERX_P3, ERX_P4, ERX_P5]
 
+    # Registers only the host writes, so our last known value can stand in for a read
+    cached_registers = (CONFIG, EN_AA, EN_RXADDR, SETUP_AW, SETUP_RETR, RF_CH, RF_SETUP, DYNPD, FEATURE)
+
+    # SPI clocks tried by begin(), fastest first. The nRF24L01+ is rated up to 10MHz
+    # but long jumper wires often are not.
+    spi_speeds = [8000000, 4000000, 2000000, 1000000]
+
     GPIO = None
     spidev = None
 
@@ -195,6 +203,9 @@ class NRF24:
         self.dynamic_payloads_enabled = False #*< Whether dynamic payloads are enabled.
         self.ack_payload_length = 5 #*< Dynamic size of pending ack payload.
         self.pipe0_reading_address = None #*< Last address set on pipe 0 for reading.
+        self.registers = {} #*< Last known value of the cached_registers.
+        self.rx_addr_p0 = None #*< Address currently written in RX_ADDR_P0.
+        self.spi_speed = 1000000 #*< SPI clock in use.
 
     def ce(self, level):
         if self.ce_pin == 0:
@@ -211,34 +222,41 @@ class NRF24:
 
 
     def read_register(self, reg, blen=1):
-        buf = [NRF24.R_REGISTER | ( NRF24.REGISTER_MASK & reg )]
-        for col in range(blen):
-            buf.append(NRF24.NOP)
+        buf = [NRF24.R_REGISTER | ( NRF24.REGISTER_MASK & reg )] + [NRF24.NOP] * blen
 
         resp = self.spidev.xfer2(buf)
         if blen == 1:
+            if reg in NRF24.cached_registers:
+                self.registers[reg] = resp[1]
             return resp[1]
 
         return resp[1:blen + 1]
 
+    def read_register_cached(self, reg):
+        # Only the host changes the configuration registers, so the last value read or
+        # written is still valid and read-modify-write does not need the read transfer.
+        if reg in self.registers:
+            return self.registers[reg]
+        return self.read_register(reg)
+
     def write_register(self, reg, value, length=-1):
-        buf = [NRF24.W_REGISTER | ( NRF24.REGISTER_MASK & reg )]
         ###if isinstance(value, (int, long)):   # ng for python3. but value should never be long anyway
         if isinstance(value, int):
             if length < 0:
                 length = 1
 
             length = min(4, length)
-            for i in range(length):
-                buf.insert(1, int(value & 0xff))
-                value >>= 8
+            buf = [NRF24.W_REGISTER | ( NRF24.REGISTER_MASK & reg )]
+            buf.extend([(value >> (8 * i)) & 0xff for i in range(length - 1, -1, -1)])
+            if reg in NRF24.cached_registers:
+                self.registers[reg] = value & 0xff
 
         elif isinstance(value, list):
             if length < 0:
                 length = len(value)
 
-            for i in range(min(len(value), length)):
-                buf.append(int(value[len(value) - i - 1] & 0xff))
+            buf = [NRF24.W_REGISTER | ( NRF24.REGISTER_MASK & reg )]
+            buf.extend([int(n) & 0xff for n in value[::-1][:length]])
         else:
             raise Exception("Value must be int or list")
 
@@ -252,14 +270,17 @@ class NRF24:
             blank_len = self.payload_size - data_len
 
         txbuffer = [NRF24.W_TX_PAYLOAD]
-        for n in buf:
-            t = type(n)
-            if t is str:
-                txbuffer.append(ord(n))
-            elif t is int:
-                txbuffer.append(n)
-            else:
-                raise Exception("Only ints and chars are supported: Found " + str(t))
+        if isinstance(buf, (bytes, bytearray, memoryview)):
+            txbuffer.extend(buf)
+        else:
+            for n in buf:
+                t = type(n)
+                if t is str:
+                    txbuffer.append(ord(n))
+                elif t is int:
+                    txbuffer.append(n)
+                else:
+                    raise Exception("Only ints and chars are supported: Found " + str(t))
 
         if blank_len != 0:
             blank = [0x00 for i in range(blank_len)]
@@ -365,19 +386,36 @@ class NRF24:
         print ("CRC Length\t = %s" % NRF24.crclength_e_str_P[self.getCRCLength()])
         print ("PA Power\t = %s" % NRF24.pa_dbm_e_str_P[self.getPALevel()])
 
-    def begin(self, csn_pin, ce_pin=0):   # csn & ce are RF24 terminology. csn = SPI's CE!
+    def begin(self, csn_pin, ce_pin=0, profile=None, spi_speed=1000000):   # csn & ce are RF24 terminology. csn = SPI's CE!
         # Initialize SPI bus..
         # ce_pin is for the rx=listen or tx=trigger pin on RF24 (they call that ce !!!)
         # CE optional (at least in some circumstances, eg fixed PTX PRX roles, no powerdown)
         # CE seems to hold itself as (sufficiently) HIGH, but tie HIGH is safer!
+        # profile (see makeProfile) selects the fast start: poll the chip instead of sleeping
+        # and only write the registers that differ from it.
+        # spi_speed above 1MHz is checked by setSpiSpeed() and lowered if the readback fails.
         self.spidev.open(0, csn_pin)
         self.spidev.max_speed_hz = 1000000
+        self.spi_speed = 1000000
+        self.registers = {}
+        self.rx_addr_p0 = None
         self.ce_pin = ce_pin
 
         if ce_pin:
             self.GPIO.setup(self.ce_pin, self.GPIO.OUT)
 
-        time.sleep(5 / 1000000.0)
+        if profile is not None:
+            self.waitForChip()
+            if spi_speed > 1000000:
+                self.setSpiSpeed(spi_speed)
+            self.configure(profile)
+
+            self.write_register(NRF24.STATUS, _BV(NRF24.RX_DR) | _BV(NRF24.TX_DS) | _BV(NRF24.MAX_RT))
+            self.flush_rx()
+            self.flush_tx()
+            return
+
+        lib_timing.delay_us(5)
 
         # Set 1500uS (minimum for 32B payload in ESB@250KBPS) timeouts, to make testing a little easier
         # WARNING: If this is ever lowered, either 250KBS mode with AA is broken or maximum packet
@@ -417,24 +455,140 @@ class NRF24:
         self.flush_rx()
         self.flush_tx()
 
+        if spi_speed > 1000000:
+            self.setSpiSpeed(spi_speed)
+
+    def checkSpiSpeed(self, speed):
+        # Write test patterns to TX_ADDR at the given clock and read them back.
+        # Any bit error means the wiring can not take that speed.
+        self.spidev.max_speed_hz = speed
+        for pattern in ([0x55, 0xaa, 0x0f, 0xf0, 0x3c], [0xff, 0x00, 0xa5, 0x5a, 0x81]):
+            self.write_register(NRF24.TX_ADDR, pattern, 5)
+            if self.read_register(NRF24.TX_ADDR, 5) != pattern[::-1]:
+                return False
+        return True
+
+    def setSpiSpeed(self, speed):
+        # Use the fastest SPI clock up to speed that passes checkSpiSpeed(), 1MHz otherwise.
+        # TX_ADDR is restored afterwards with the known good 1MHz clock.
+        self.spidev.max_speed_hz = 1000000
+        tx_addr = self.read_register(NRF24.TX_ADDR, 5)
+
+        self.spi_speed = 1000000
+        for candidate in [speed] + [s for s in NRF24.spi_speeds if s < speed]:
+            if candidate <= 1000000:
+                break
+            if self.checkSpiSpeed(candidate):
+                self.spi_speed = candidate
+                break
+
+        self.spidev.max_speed_hz = 1000000
+        self.write_register(NRF24.TX_ADDR, tx_addr[::-1], 5)
+        self.spidev.max_speed_hz = self.spi_speed
+        return self.spi_speed
+
+    def waitForChip(self, timeout=0.2):
+        # After power-on reset the chip needs up to 100ms before it answers on SPI.
+        # Poll until STATUS and SETUP_AW read back sane values instead of sleeping blindly.
+        # (Nothing on the bus reads as all 0x00 or all 0xff, both fail the check)
+        started = time.time()
+        while True:
+            status = self.get_status()
+            address_width = self.read_register(NRF24.SETUP_AW)
+            if not status & 0x80 and 1 <= address_width <= 3:
+                return True
+            if time.time() - started > timeout:
+                raise Exception("nRF24 is not answering on SPI")
+            lib_timing.delay_us(1000)
+
+    @staticmethod
+    def makeProfile(channel=76, data_rate=BR_1MBPS, pa_level=PA_MAX, crc_length=CRC_16, retries=(4, 15),
+                    auto_ack=True, dynamic_payloads=False, ack_payload=False):
+        # Register values for a whole configuration, as a list of (register, value) in the
+        # order they must be written: FEATURE before DYNPD, CONFIG (power up) last.
+        rf_setup = 0x01   # LNA_HCURR, as after reset
+        if data_rate == NRF24.BR_250KBPS:
+            rf_setup |= _BV(NRF24.RF_DR_LOW)
+        elif data_rate == NRF24.BR_2MBPS:
+            rf_setup |= _BV(NRF24.RF_DR_HIGH)
+        rf_setup |= [0, _BV(NRF24.RF_PWR_LOW), _BV(NRF24.RF_PWR_HIGH),
+                     _BV(NRF24.RF_PWR_LOW) | _BV(NRF24.RF_PWR_HIGH)][min(pa_level, NRF24.PA_MAX)]
+
+        feature = 0
+        dynpd = 0
+        if dynamic_payloads:
+            feature |= _BV(NRF24.EN_DPL)
+            dynpd = 0b111111
+        if ack_payload:
+            feature |= _BV(NRF24.EN_ACK_PAY) | _BV(NRF24.EN_DPL)
+            dynpd |= _BV(NRF24.DPL_P1) | _BV(NRF24.DPL_P0)
+
+        config = _BV(NRF24.PWR_UP)
+        if crc_length == NRF24.CRC_8:
+            config |= _BV(NRF24.EN_CRC)
+        elif crc_length != NRF24.CRC_DISABLED:
+            config |= _BV(NRF24.EN_CRC) | _BV(NRF24.CRCO)
+
+        return [(NRF24.SETUP_RETR, (retries[0] & 0xf) << NRF24.ARD | (retries[1] & 0xf)),
+                (NRF24.RF_CH, min(max(0, channel), NRF24.MAX_CHANNEL)),
+                (NRF24.RF_SETUP, rf_setup),
+                (NRF24.EN_AA, 0b111111 if auto_ack else 0),
+                (NRF24.FEATURE, feature),
+                (NRF24.DYNPD, dynpd),
+                (NRF24.CONFIG, config)]
+
+    def readRegisters(self, regs):
+        # Snapshot of the given single byte registers (refreshes the cached ones too)
+        return dict((reg, self.read_register(reg)) for reg in regs)
+
+    def configure(self, profile):
+        # Bring the chip to the profile writing only the registers that differ from it,
+        # so a warm chip that already matches costs a handful of reads and no writes.
+        current = self.readRegisters([reg for reg, value in profile])
+        powering_up = False
+
+        for reg, value in profile:
+            if current[reg] == value:
+                continue
+
+            if reg == NRF24.CONFIG and value & _BV(NRF24.PWR_UP) and not current[reg] & _BV(NRF24.PWR_UP):
+                powering_up = True
+
+            self.write_register(reg, value)
+            if reg == NRF24.FEATURE and self.read_register(NRF24.FEATURE) != value:
+                # Features are locked on the non-P model until ACTIVATE is sent
+                self.toggle_features()
+                self.write_register(reg, value)
+
+        # Keep our copy of the settings in step with the chip
+        settings = dict(profile)
+        self.channel = settings.get(NRF24.RF_CH, self.channel)
+        self.wide_band = bool(settings.get(NRF24.RF_SETUP, 0) & _BV(NRF24.RF_DR_HIGH))
+        self.dynamic_payloads_enabled = bool(settings.get(NRF24.FEATURE, 0) & _BV(NRF24.EN_DPL))
+
+        if powering_up:
+            # Tpd2stby, power down to standby takes up to 1.5ms
+            lib_timing.delay_us(1500)
+
     def end(self):
         if self.spidev:
             self.spidev.close()
             self.spidev = None
 
     def startListening(self):
-        self.write_register(NRF24.CONFIG, self.read_register(NRF24.CONFIG) | _BV(NRF24.PWR_UP) | _BV(NRF24.PRIM_RX))
+        self.write_register(NRF24.CONFIG, self.read_register_cached(NRF24.CONFIG) | _BV(NRF24.PWR_UP) | _BV(NRF24.PRIM_RX))
         self.write_register(NRF24.STATUS, _BV(NRF24.RX_DR) | _BV(NRF24.TX_DS) | _BV(NRF24.MAX_RT))
 
-        # Restore the pipe0 address, if exists
-        if self.pipe0_reading_address:
+        # Restore the pipe0 address, if exists (and openWritingPipe() changed it)
+        if self.pipe0_reading_address and self.rx_addr_p0 != self.pipe0_reading_address:
             self.write_register(self.RX_ADDR_P0, self.pipe0_reading_address, 5)
+            self.rx_addr_p0 = self.pipe0_reading_address
 
         # Go!
         self.ce(NRF24.HIGH)
 
         # wait for the radio to come up (130us actually only needed)
-        time.sleep(130 / 1000000.0)
+        lib_timing.delay_us(130)
 
     def stopListening(self):
         self.ce(NRF24.LOW)
@@ -442,25 +596,25 @@ class NRF24:
         self.flush_rx()
 
     def powerDown(self):
-        self.write_register(NRF24.CONFIG, self.read_register(NRF24.CONFIG) & ~_BV(NRF24.PWR_UP))
+        self.write_register(NRF24.CONFIG, self.read_register_cached(NRF24.CONFIG) & ~_BV(NRF24.PWR_UP))
 
     def powerUp(self):
-        self.write_register(NRF24.CONFIG, self.read_register(NRF24.CONFIG) | _BV(NRF24.PWR_UP))
-        time.sleep(150 / 1000000.0)
+        self.write_register(NRF24.CONFIG, self.read_register_cached(NRF24.CONFIG) | _BV(NRF24.PWR_UP))
+        lib_timing.delay_us(150)
 
     def write(self, buf):
         # Begin the write
         self.startWrite(buf)
 
         timeout = self.getMaxTimeout() #s to wait for timeout
-        sent_at = time.time()
+        sent_at = time.perf_counter()
 
         while True:
             #status = self.read_register(NRF24.OBSERVE_TX, 1)
             status = self.get_status()
-            if (status & (_BV(NRF24.TX_DS) | _BV(NRF24.MAX_RT))) or (time.time() - sent_at > timeout ):
+            if (status & (_BV(NRF24.TX_DS) | _BV(NRF24.MAX_RT))) or (time.perf_counter() - sent_at > timeout ):
                 break
-            time.sleep(10 / 1000000.0)
+            lib_timing.delay_us(10)
         #obs = self.read_register(NRF24.OBSERVE_TX)
         #self.print_observe_tx(obs)
         #self.print_status(status)
@@ -479,8 +633,10 @@ class NRF24:
         return result
 
     def startWrite(self, buf):
-        # Transmitter power-up
-        self.write_register(NRF24.CONFIG, (self.read_register(NRF24.CONFIG) | _BV(NRF24.PWR_UP) ) & ~_BV(NRF24.PRIM_RX))
+        # Transmitter power-up (already there when sending frames back to back)
+        config = self.read_register_cached(NRF24.CONFIG)
+        if config & (_BV(NRF24.PWR_UP) | _BV(NRF24.PRIM_RX)) != _BV(NRF24.PWR_UP):
+            self.write_register(NRF24.CONFIG, (config | _BV(NRF24.PWR_UP) ) & ~_BV(NRF24.PRIM_RX))
 
         # Send the payload
         self.write_payload(buf)
@@ -489,7 +645,7 @@ class NRF24:
         if self.ce_pin:
             if self.GPIO.RPI_REVISION > 0:
                 self.ce(self.GPIO.HIGH)
-                time.sleep(10 / 1000000.0)
+                lib_timing.delay_us(10)
                 self.ce(self.GPIO.LOW)
             else:
                 # virtGPIO is slower. A 10 uSec pulse is better done with pulseOut():
@@ -521,7 +677,9 @@ class NRF24:
 
                 # ??? Should this REALLY be cleared now?  Or wait until we
                 # actually READ the payload?
-        self.write_register(NRF24.STATUS, _BV(NRF24.RX_DR))
+        # (writing a 0 bit changes nothing, so only spend the transfer when it is set)
+        if status & _BV(NRF24.RX_DR):
+            self.write_register(NRF24.STATUS, _BV(NRF24.RX_DR))
 
         # Handle ack payload receipt
         if status & _BV(NRF24.TX_DS):
@@ -553,6 +711,7 @@ class NRF24:
 
         self.write_register(NRF24.RX_ADDR_P0, value, 5)
         self.write_register(NRF24.TX_ADDR, value, 5)
+        self.rx_addr_p0 = value
 
         max_payload_size = 32
         self.write_register(NRF24.RX_PW_P0, min(self.payload_size, max_payload_size))
@@ -568,6 +727,8 @@ class NRF24:
             # For pipes 2-5, only write the LSB
             if child < 2:
                 self.write_register(NRF24.child_pipe[child], address, 5)
+                if child == 0:
+                    self.rx_addr_p0 = address
             else:
                 self.write_register(NRF24.child_pipe[child], address, 1)
 
@@ -577,12 +738,12 @@ class NRF24:
             # pipes at once.  However, I thought it would make the calling code
             # more simple to do it this way.
             self.write_register(NRF24.EN_RXADDR,
-                                self.read_register(NRF24.EN_RXADDR) | _BV(NRF24.child_pipe_enable[child]))
+                                self.read_register_cached(NRF24.EN_RXADDR) | _BV(NRF24.child_pipe_enable[child]))
 
 
     def closeReadingPipe(self, pipe):
         self.write_register(NRF24.EN_RXADDR,
-            self.read_register(EN_RXADDR) & ~_BV(NRF24.child_pipe_enable[pipe]))
+            self.read_register_cached(NRF24.EN_RXADDR) & ~_BV(NRF24.child_pipe_enable[pipe]))
 
 
     def toggle_features(self):
@@ -603,7 +764,7 @@ class NRF24:
 
         # Not sure the use case of only having dynamic payload on certain
         # pipes, so the library does not support it.
-        self.write_register(NRF24.DYNPD, self.read_register(NRF24.DYNPD) | _BV(NRF24.DPL_P5) | _BV(NRF24.DPL_P4) | _BV(
+        self.write_register(NRF24.DYNPD, self.read_register_cached(NRF24.DYNPD) | _BV(NRF24.DPL_P5) | _BV(NRF24.DPL_P4) | _BV(
             NRF24.DPL_P3) | _BV(NRF24.DPL_P2) | _BV(NRF24.DPL_P1) | _BV(NRF24.DPL_P0))
 
         self.dynamic_payloads_enabled = True
@@ -622,7 +783,7 @@ class NRF24:
                                 self.read_register(NRF24.FEATURE) | _BV(NRF24.EN_ACK_PAY) | _BV(NRF24.EN_DPL))
 
         # Enable dynamic payload on pipes 0 & 1
-        self.write_register(NRF24.DYNPD, self.read_register(NRF24.DYNPD) | _BV(NRF24.DPL_P1) | _BV(NRF24.DPL_P0))
+        self.write_register(NRF24.DYNPD, self.read_register_cached(NRF24.DYNPD) | _BV(NRF24.DPL_P1) | _BV(NRF24.DPL_P0))
 
     def writeAckPayload(self, pipe, buf, buf_len):
         txbuffer = [NRF24.W_ACK_PAYLOAD | ( pipe & 0x7 )]
@@ -649,7 +810,7 @@ class NRF24:
 
     def setAutoAckPipe(self, pipe, enable):
         if pipe <= 6:
-            en_aa = self.read_register(NRF24.EN_AA)
+            en_aa = self.read_register_cached(NRF24.EN_AA)
             if enable:
                 en_aa |= _BV(pipe)
             else:
@@ -664,7 +825,7 @@ class NRF24:
         return self.read_register(NRF24.RPD) & 1
 
     def setPALevel(self, level):
-        setup = self.read_register(NRF24.RF_SETUP)
+        setup = self.read_register_cached(NRF24.RF_SETUP)
         setup &= ~( _BV(NRF24.RF_PWR_LOW) | _BV(NRF24.RF_PWR_HIGH))
         # switch uses RAM (evil!)
         if level == NRF24.PA_MAX:
@@ -696,7 +857,7 @@ class NRF24:
 
     def setDataRate(self, speed):
         result = False
-        setup = self.read_register(NRF24.RF_SETUP)
+        setup = self.read_register_cached(NRF24.RF_SETUP)
 
         # HIGH and LOW '00' is 1Mbs - our default
         self.wide_band = False
@@ -741,7 +902,7 @@ class NRF24:
 
 
     def setCRCLength(self, length):
-        config = self.read_register(NRF24.CONFIG) & ~( _BV(NRF24.CRC_16) | _BV(NRF24.CRC_ENABLED))
+        config = self.read_register_cached(NRF24.CONFIG) & ~( _BV(NRF24.CRC_16) | _BV(NRF24.CRC_ENABLED))
 
         if length == NRF24.CRC_DISABLED:
             # Do nothing, we turned it off above.
@@ -769,7 +930,7 @@ class NRF24:
         return result
 
     def disableCRC(self):
-        disable = self.read_register(NRF24.CONFIG) & ~_BV(NRF24.EN_CRC)
+        disable = self.read_register_cached(NRF24.CONFIG) & ~_BV(NRF24.EN_CRC)
         self.write_register(NRF24.CONFIG, disable)
 
     def setRetries(self, delay, count):
@@ -781,7 +942,7 @@ class NRF24:
         return self.read_register(NRF24.SETUP_RETR)
 
     def getMaxTimeout(self):        # seconds
-        retries = self.getRetries()
+        retries = self.read_register_cached(NRF24.SETUP_RETR)
         tout = (((250+(250*((retries& 0xf0)>>4 ))) * (retries & 0x0f)) / 1000000.0 * 2) + 0.008
         # Fudged up to about double Barraca's calculation
         # Was too short & was timeing out wrongly.    BL
@@ -0,0 +1,187 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Multi-process transfer pipeline for the Quick Mode scripts of Team B
+# Worker processes read the file, build the frames and compute their CRC into
+# rings of fixed 32 byte slots in shared memory, while the radio process only
+# takes the frames out and talks SPI. On the receiving side the radio process
+# puts the data into a ring and a writer process hashes it and writes the file.
+# Date: 19/10/2026
+# Version: 1.0
+
+import os
+import sys
+import hashlib
+import multiprocessing
+from multiprocessing import shared_memory
+import lib_quickmode
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_pipeline")
+    print("")
+
+    exit()
+
+
+# Slots of every ring: a worker can be this many frames ahead of the radio
+RING_SLOTS = 256
+
+# The rings and their semaphores are inherited by the workers, not pickled
+_context = multiprocessing.get_context('fork')
+
+
+class FrameRing:
+    """ Ring of RING_SLOTS frames in shared memory between one producer
+    and one consumer process. The slots are FRAME_SIZE bytes, their
+    lengths follow in one byte each; a length of 0 ends the stream.
+    Two semaphores count the free and the filled slots, each process
+    only moves its own index. """
+
+    def __init__(self, slots=RING_SLOTS):
+        self.slots = slots
+        self.memory = shared_memory.SharedMemory(create=True, size=slots * (lib_quickmode.FRAME_SIZE + 1))
+        self.frames = self.memory.buf[:slots * lib_quickmode.FRAME_SIZE]
+        self.lengths = self.memory.buf[slots * lib_quickmode.FRAME_SIZE:]
+        self.free = _context.Semaphore(slots)
+        self.filled = _context.Semaphore(0)
+        self.head = 0
+        self.tail = 0
+
+    def put(self, frame):
+        """ Copies a frame (b'' to end the stream) into the next slot,
+        waiting for the consumer if the ring is full. """
+
+        self.free.acquire()
+        offset = self.head * lib_quickmode.FRAME_SIZE
+        self.frames[offset:offset + len(frame)] = frame
+        self.lengths[self.head] = len(frame)
+        self.head = (self.head + 1) % self.slots
+        self.filled.release()
+
+    def get(self):
+        """ Takes the next frame out of the ring as bytes, b'' at the end
+        of the stream, waiting for the producer if the ring is empty. """
+
+        self.filled.acquire()
+        offset = self.tail * lib_quickmode.FRAME_SIZE
+        frame = bytes(self.frames[offset:offset + self.lengths[self.tail]])
+        self.tail = (self.tail + 1) % self.slots
+        self.free.release()
+
+        return frame
+
+    def close(self):
+        """ Releases the shared memory. The creator also unlinks it. """
+
+        self.frames.release()
+        self.lengths.release()
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+def frame_worker(ring, file_path, worker, workers):
+    """ Builds the FRAME_DATA frames of the file that belong to this
+    worker (chunk worker, worker + workers, ...) into its ring. """
+
+    view = lib_quickmode.mapped_file(file_path)
+    writer = lib_quickmode.FrameWriter()
+    size = lib_quickmode.DATA_SIZE
+    for index in range(worker, (len(view) + size - 1) // size, workers):
+        ring.put(writer.build(lib_quickmode.FRAME_DATA, index, view[index * size:(index + 1) * size]))
+    ring.put(b'')
+    ring.close()
+
+
+def default_workers():
+    """ One worker per core left after the radio process, at least one. """
+
+    return max((os.cpu_count() or 1) - 1, 1)
+
+
+def pipeline_frames(file_path, workers=None):
+    """ Generator that starts the workers and yields the frames of the
+    file in order, taking them from the ring of each worker in turn. """
+
+    workers = workers or default_workers()
+    rings = [FrameRing() for worker in range(workers)]
+    processes = [_context.Process(target=frame_worker, args=(ring, file_path, worker, workers), daemon=True)
+                 for worker, ring in enumerate(rings)]
+    for process in processes:
+        process.start()
+
+    try:
+        index = 0
+        while True:
+            frame = rings[index % workers].get()
+            if not frame:
+                break
+            yield frame
+            index += 1
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+        for ring in rings:
+            ring.close()
+            ring.unlink()
+
+
+def send_pipeline(radio, file_path, workers=None, stats=None):
+    """ Sends the file with STOP&WAIT, the frames coming from the worker
+    processes. It returns the next free sequence number. """
+
+    seq = 0
+    for frame in pipeline_frames(file_path, workers):
+        lib_quickmode.send_frame(radio, frame, stats=stats)
+        seq = (frame[1] + 1) & 0xff
+
+    return seq
+
+
+def file_writer(ring, file_path, size, results):
+    """ Writes the data coming from the ring into the file, which is
+    preallocated to size bytes, and puts the bytes written and their
+    MD5 digest in the results queue. """
+
+    digest = hashlib.md5()
+    written = 0
+    with open(file_path, "wb") as f:
+        if size and hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(f.fileno(), 0, size)
+        while True:
+            data = ring.get()
+            if not data:
+                break
+            f.write(data)
+            digest.update(data)
+            written += len(data)
+        f.truncate(written)
+
+    ring.close()
+    results.put((written, digest.digest()))
+
+
+def receive_pipeline(radio, file_path, session, stats=None):
+    """ Receives the data of the session with receive_stream() and hands
+    it to a writer process through a ring. It returns the bytes written
+    and their MD5 digest once the writer is done. """
+
+    ring = FrameRing()
+    results = _context.Queue()
+    writer = _context.Process(target=file_writer, args=(ring, file_path, session.size, results), daemon=True)
+    writer.start()
+
+    try:
+        for data in lib_quickmode.receive_stream(radio, stats=stats, session=session):
+            ring.put(data)
+        ring.put(b'')
+        written, digest = results.get()
+        writer.join()
+    finally:
+        ring.close()
+        ring.unlink()
+
+    return written, digest
@@ -0,0 +1,1913 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Shared protocol helpers for the Quick Mode scripts of Team B
+# Frame building and checking, the STOP&WAIT transport and the batch
+# manifest live here so the transfer modes do not each carry a copy.
+# Date: 19/10/2026
+# Version: 1.0
+
+import os
+import sys
+import mmap
+import time
+import struct
+import random
+import hashlib
+import threading
+import collections
+import crc16
+import lib_timing
+import lib_fec
+import lib_linkstats
+from lib_nrf24 import NRF24
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_quickmode")
+    print("")
+
+    exit()
+
+
+# Every frame is [type][seq][data ...][crc16], never more than 32 bytes
+FRAME_SIZE = 32
+HEADER_SIZE = 2
+CRC_SIZE = 2
+DATA_SIZE = FRAME_SIZE - HEADER_SIZE - CRC_SIZE
+
+# Frame types
+FRAME_DATA = 0x01
+FRAME_ACK = 0x02
+FRAME_NAK = 0x03
+FRAME_FIN = 0x04
+FRAME_FIN_ACK = 0x05
+FRAME_RATE = 0x06
+FRAME_HOP = 0x07
+FRAME_MDATA = 0x08
+FRAME_POLL = 0x09
+FRAME_REPORT = 0x0a
+FRAME_FEC = 0x0b
+FRAME_FEC_END = 0x0c
+FRAME_CREDIT_REQUEST = 0x0d
+FRAME_CREDIT = 0x0e
+FRAME_SYN = 0x0f
+FRAME_SYN_ACK = 0x10
+FRAME_DATA_POLL = 0x11
+FRAME_SACK = 0x12
+FRAME_MSG = 0x13
+FRAME_MSG_ACK = 0x14
+FRAME_BEACON = 0x15
+FRAME_JOIN = 0x16
+FRAME_DUPLEX = 0x17
+
+# Seconds to wait for an answer before resending a frame
+ACK_TIMEOUT = 1
+
+# Seconds of silence the receiver waits after FIN in case its FIN_ACK got lost,
+# at most: the FIN carries the timeout of the sender, and the receiver only
+# waits for FIN_ATTEMPTS of them. The sender repeats the FIN for FIN_ATTEMPTS
+# times and at least FIN_LINGER seconds before giving up
+FIN_LINGER = 1
+FIN_ATTEMPTS = 4
+
+# Session handshake: FRAME_SYN carries the protocol version, the size and MD5
+# of the file and the window, codec and FEC parity the sender proposes, the
+# FRAME_SYN_ACK the status and the parameters the receiver agrees to. The SYN
+# takes the sequence number before the first data frame
+SESSION_VERSION = 1
+SESSION_SYN = struct.Struct('>BQ16sBBB')
+SESSION_SYN_ACK = struct.Struct('>BBBB')
+SESSION_SEQ = 0xff
+SESSION_ACCEPT = 0
+SESSION_BAD_VERSION = 1
+SESSION_NO_ROOM = 2
+SESSION_REFUSED = 3
+SESSION_ERRORS = {SESSION_BAD_VERSION: "unsupported protocol version",
+                  SESSION_NO_ROOM: "not enough room for the file",
+                  SESSION_REFUSED: "file refused"}
+CODEC_RAW = 0
+CODEC_DEDUP = 1
+
+# Rate ladder of RateController, (data rate, PA level) from the most robust to
+# the fastest. RATE_START is the step the scripts configure at start.
+RATE_LADDER = [(NRF24.BR_250KBPS, NRF24.PA_HIGH), (NRF24.BR_250KBPS, NRF24.PA_MIN),
+               (NRF24.BR_1MBPS, NRF24.PA_MIN), (NRF24.BR_2MBPS, NRF24.PA_MIN)]
+RATE_START = 1
+RATE_WINDOW = 32
+RATE_DOWN = 0.7
+RATE_UP = 0.95
+RATE_MAX_CRC = 0.1
+# Seconds of silence before both ends go back to the initial step, the sender
+# counting from its last ACK and after at least RATE_FALLBACK_ATTEMPTS failures
+RATE_FALLBACK_ATTEMPTS = 3
+RATE_FALLBACK = 3
+# Seconds switch_rate() looks for the receiver before giving up on the link
+RATE_SWITCH_LIMIT = 10 * RATE_FALLBACK
+# Seconds of silence after which a receiver that has heard the sender takes it
+# as gone and ends the stream without its FIN, as long as a rate switch may take
+RECEIVE_IDLE = RATE_SWITCH_LIMIT
+
+# Frequency hopping: channels used (2402-2480MHz), frames sent on each hop,
+# seconds of silence before the receiver also listens on the channel of
+# its last ACK (longer than ACK_TIMEOUT, so it catches a repetition there)
+HOP_CHANNELS = range(2, 81)
+HOP_DWELL = 8
+HOP_RESYNC = 1.5
+# Blacklisting: share of RPD hits while scanning, or of lost frames after
+# HOP_MIN_ATTEMPTS on a channel, and channels that are always kept
+HOP_RPD_LIMIT = 0.25
+HOP_MAX_LOSS = 0.5
+HOP_MIN_ATTEMPTS = 6
+HOP_MIN_CHANNELS = 8
+
+# Multicast: blocks sent before polling the receivers (the missing ones
+# must fit in the bitmap of a FRAME_REPORT), polls without answer before
+# a receiver is dropped, FIN repetitions and seconds of silence after which
+# a receiver that has everything stops waiting for the FIN
+MULTICAST_WINDOW = 200
+MULTICAST_BLOCK_SIZE = DATA_SIZE - 1
+MULTICAST_POLL_ATTEMPTS = 10
+MULTICAST_FIN_REPEAT = 3
+MULTICAST_LINGER = 3
+
+# Hybrid ARQ: data frames per FEC block and payload of a FRAME_FEC after its
+# [index][k] header, FEC_LAST flags the frames of the last block. The loss
+# estimate that sets the parity starts at FEC_INITIAL_LOSS
+FEC_K = 8
+FEC_PAYLOAD = DATA_SIZE - 2
+FEC_LAST = 0x80
+FEC_MAX_INDEX = 0x7f
+FEC_INITIAL_LOSS = 0.1
+
+# Flow control: frames the receiver buffers (less than half the sequence
+# space), frames sent between credit requests (fewer on a lossy link), pacing in frames per second
+# (start, floor, ceiling) and its growth while the receiver keeps its buffer
+# empty, share of lost frames that means an overrun and the cut it causes,
+# and pause when the receiver has no room
+FLOW_BUFFER = 64
+FLOW_POLL = 16
+FLOW_MIN_POLL = 4
+FLOW_INITIAL_RATE = 200
+FLOW_MIN_RATE = 20
+FLOW_MAX_RATE = 4000
+FLOW_BURST = 4
+FLOW_PROBE = 1.25
+FLOW_MAX_LOSS = 0.1
+FLOW_BACKOFF = 0.7
+FLOW_IDLE = 0.01
+
+# ACK payloads: the receiver never leaves RX and its answer rides in the
+# hardware ACK (auto-ack, up to 15 retransmissions 1500us apart, enough for
+# an ACK payload at 250kbps), on the pipe the data arrives on. The sender
+# keeps up to ACKPAY_WINDOW frames (less than half the sequence space) for a
+# rewind, and waits ACKPAY_IDLE seconds when a report does not come back
+ACKPAY_RETRIES = (5, 15)
+ACKPAY_WINDOW = 64
+ACKPAY_PIPE = 0
+ACKPAY_IDLE = 0.001
+
+# Selective ACK: the sender sends bursts of up to SACK_BURST frames (at least
+# SACK_MIN_BURST on a lossy link) and the last one, a FRAME_DATA_POLL, asks
+# for the FRAME_SACK: the next sequence number expected plus a bitmap of the
+# SACK_WINDOW frames after it. If the poll is lost the receiver answers after
+# SACK_DELAY seconds of silence
+SACK_WINDOW = 32
+SACK_BURST = 16
+SACK_MIN_BURST = 4
+SACK_DELAY = 0.02
+
+# Multiplexing: the first data byte of a FRAME_DATA is the stream id, with
+# MUX_END set on the last frame of a message. Batch mode sends the files on
+# MUX_BULK and short control and telemetry messages on MUX_CONTROL
+MUX_END = 0x80
+MUX_DATA_SIZE = DATA_SIZE - 1
+MUX_CONTROL = 0
+MUX_BULK = 1
+
+# Batch manifest: magic, number of entries, then one entry per file
+MANIFEST_MAGIC = b'QMB1'
+MANIFEST_HEADER = struct.Struct('>4sH')
+MANIFEST_ENTRY = struct.Struct('>HQ16s')
+
+
+def build_frame(frame_type, seq, data=b''):
+    """ Builds a frame with the given type, sequence number and data,
+    appending the CRC of everything before it. """
+
+    body = bytes((frame_type, seq & 0xff)) + bytes(data)
+    return body + struct.pack('>H', crc16.crc16xmodem(body))
+
+
+class FrameWriter:
+    """ Builds frames like build_frame(), but always into the same
+    buffer: the data is copied straight from the memoryview it comes in
+    and nothing is allocated per frame. The frame returned is a view of
+    that buffer, only valid until the next call to build(). """
+
+    def __init__(self):
+        self.buffer = bytearray(FRAME_SIZE)
+        self.view = memoryview(self.buffer)
+        # crc16 only takes read-only buffers
+        self.readonly = self.view.toreadonly()
+
+    def build(self, frame_type, seq, data=b''):
+        end = HEADER_SIZE + len(data)
+        self.buffer[0] = frame_type
+        self.buffer[1] = seq & 0xff
+        self.buffer[HEADER_SIZE:end] = data
+        struct.pack_into('>H', self.buffer, end, crc16.crc16xmodem(self.readonly[:end]))
+
+        return self.view[:end + CRC_SIZE]
+
+
+def parse_frame(buf):
+    """ Checks the CRC of a received frame and splits it.
+
+    It returns (frame_type, seq, data), or None if the frame is
+    too short or its CRC is not consistent. """
+
+    buf = bytes(buf)
+    if len(buf) < HEADER_SIZE + CRC_SIZE:
+        return None
+
+    body = buf[:-CRC_SIZE]
+    if struct.unpack('>H', buf[-CRC_SIZE:])[0] != crc16.crc16xmodem(body):
+        return None
+
+    return body[0], body[1], body[HEADER_SIZE:]
+
+
+def send_packet(sender, payload):
+    """ Send the packet through the sender radio. """
+
+    sender.write(payload)
+
+
+def wait_for_data(receiver, timeout=None):
+    """ This is a blocking function that waits until data is
+    available in the receiver, or until the timeout (in seconds) has passed.
+
+    It returns True if there is data to read. """
+
+    timeout_starts = time.time()
+    while not receiver.available():
+        if timeout is not None and (time.time() - timeout_starts) >= timeout:
+            return False
+        time.sleep(0.001)
+
+    return True
+
+
+def read_packet(receiver):
+    """ Reads the next payload waiting in the receiver as bytes. """
+
+    recv_buffer = []
+    receiver.read(recv_buffer, receiver.getDynamicPayloadSize())
+    return bytes(recv_buffer)
+
+
+def try_send(radio, frame, seq, answer=FRAME_ACK, timeout=ACK_TIMEOUT):
+    """ Sends a frame once and waits for the answer of the other side.
+
+    It returns (data, nak): data is what the answer carried, or None if
+    there was no good answer before the timeout; nak tells whether the
+    other side reported the frame as corrupted. """
+
+    send_packet(radio, frame)
+
+    # Did we get an ACK back?
+    radio.startListening()
+    deadline = time.time() + timeout
+    while wait_for_data(radio, deadline - time.time()):
+        reply = parse_frame(read_packet(radio))
+        if reply is not None and reply[0] == answer and reply[1] == seq & 0xff:
+            radio.stopListening()
+            return reply[2], False
+        if reply is not None and reply[0] == FRAME_NAK:
+            radio.stopListening()
+            return None, True
+    radio.stopListening()
+
+    return None, False
+
+
+def send_reliable(radio, frame_type, seq, data=b'', answer=FRAME_ACK, timeout=ACK_TIMEOUT, observers=(), stats=None,
+                  writer=None):
+    """ Sends one frame using STOP&WAIT: the frame is resent until
+    the other side answers with a frame of type answer and the same
+    sequence number. It returns the data carried by the answer.
+
+    Every attempt is reported to the observers (RateController,
+    HopSequence) through their on_attempt(acked, nak, length). With a
+    LinkStats the timeout follows the measured round trip time, with a
+    FrameWriter the frame is built in its buffer. """
+
+    frame = writer.build(frame_type, seq, data) if writer else build_frame(frame_type, seq, data)
+    return send_frame(radio, frame, answer, timeout, observers, stats)
+
+
+def send_frame(radio, frame, answer=FRAME_ACK, timeout=ACK_TIMEOUT, observers=(), stats=None):
+    """ Sends an already built frame with STOP&WAIT, like send_reliable(),
+    and returns the data carried by the answer. """
+
+    seq = frame[1]
+    length = len(frame) - HEADER_SIZE - CRC_SIZE
+    while True:
+        started = time.time()
+        reply, nak = try_send(radio, frame, seq, answer, stats.timeout() if stats else timeout)
+        for observer in observers:
+            observer.on_attempt(reply is not None, nak, length)
+        if stats:
+            stats.on_attempt(reply is not None, nak, length, time.time() - started)
+        if reply is not None:
+            return reply
+
+
+def switch_rate(radio, seq, controller, step):
+    """ Moves both ends to another step of the rate ladder with a
+    FRAME_RATE. The receiver acknowledges it with the old settings and
+    then switches; if that ACK gets lost, the sender alternates between
+    the old and the new settings until the receiver answers, and after
+    RATE_FALLBACK seconds also tries the initial step, where the receiver
+    goes back on its own. It raises an Exception when nobody answers for
+    RATE_SWITCH_LIMIT seconds. """
+
+    old_step = controller.step
+    frame = build_frame(FRAME_RATE, seq, bytes(controller.ladder[step]))
+    started = time.time()
+    attempts = 0
+    while time.time() - started < RATE_SWITCH_LIMIT:
+        if attempts < RATE_FALLBACK_ATTEMPTS:
+            steps = [old_step]
+        elif time.time() - started < RATE_FALLBACK:
+            steps = [old_step, step]
+        else:
+            steps = list(dict.fromkeys([old_step, step, controller.base]))
+        controller.apply(steps[attempts % len(steps)])
+        reply, nak = try_send(radio, frame, seq)
+        if reply is not None:
+            controller.apply(step)
+            controller.last_ack = time.time()
+            return
+        attempts += 1
+
+    raise Exception("The receiver does not answer at any data rate")
+
+
+def send_stream(radio, chunks, seq=0, controller=None, hopper=None, stats=None):
+    """ Sends every chunk of data as a FRAME_DATA using STOP&WAIT
+    and returns the next free sequence number.
+
+    With a RateController the data rate and PA level follow the
+    conditions of the link while the stream is sent. With a HopSequence
+    the stream starts with a FRAME_HOP and every frame goes out on the
+    channel the hopping schedule gives for it. With a LinkStats every
+    attempt is measured and the ACK timeout follows the link. """
+
+    observers = [observer for observer in (controller, hopper) if observer]
+    writer = FrameWriter()
+    if hopper:
+        seq = start_hopping(radio, seq, hopper)
+
+    for chunk in chunks:
+        if hopper:
+            # Blacklist lossy channels once we are off them, on a hop boundary
+            lossy = hopper.lossy_channel()
+            if lossy is not None and hopper.frames % HOP_DWELL == 0:
+                seq = start_hopping(radio, seq, hopper, hopper.blacklist | 1 << lossy)
+            hopper.tune(radio)
+        if controller:
+            step = controller.next_step()
+            if step is not None:
+                switch_rate(radio, seq, controller, step)
+                seq = (seq + 1) & 0xff
+                if hopper:
+                    hopper.frames += 1
+                    hopper.tune(radio)
+        send_reliable(radio, FRAME_DATA, seq, chunk, observers=observers, stats=stats, writer=writer)
+        seq = (seq + 1) & 0xff
+        if hopper:
+            hopper.frames += 1
+
+    if hopper:
+        hopper.tune(radio)
+
+    return seq
+
+
+def start_hopping(radio, seq, hopper, blacklist=None):
+    """ Sends a FRAME_HOP with the seed and the blacklist of the sender
+    and restarts the schedule with the union of both blacklists, the
+    receiver's arriving in the ACK. It returns the next sequence number. """
+
+    if blacklist is None:
+        blacklist = hopper.blacklist
+    # The first FRAME_HOP goes out on the channel both ends start on
+    if hopper.current is not None:
+        hopper.tune(radio)
+    data = struct.pack('>I', hopper.seed) + blacklist_bytes(blacklist)
+    reply = send_reliable(radio, FRAME_HOP, seq, data)
+    hopper.restart(blacklist | blacklist_from_bytes(reply))
+    print("Hopping over " + str(len(hopper.order)) + " channels")
+
+    return (seq + 1) & 0xff
+
+
+def finish_stream(radio, seq, stats=None):
+    """ Tells the receiver that the transfer is over and waits for
+    its final acknowledgement, one round trip when it arrives.
+
+    Every data frame is acknowledged by then, so after FIN_ATTEMPTS, and
+    FIN_LINGER seconds however short the timeout, the sender gives up.
+    The FIN carries the timeout (from the LinkStats, if there is one) so
+    the receiver lingers just as long. It returns True if the
+    FRAME_FIN_ACK arrived. """
+
+    deadline = time.time() + FIN_LINGER
+    attempts = 0
+    while attempts < FIN_ATTEMPTS or time.time() < deadline:
+        attempts += 1
+        timeout = stats.timeout() if stats else ACK_TIMEOUT
+        frame = build_frame(FRAME_FIN, seq, struct.pack('>H', min(int(timeout * 1000), 0xffff)))
+        started = time.time()
+        reply, nak = try_send(radio, frame, seq, FRAME_FIN_ACK, timeout)
+        if stats:
+            stats.on_attempt(reply is not None, nak, 0, time.time() - started)
+        if reply is not None:
+            return True
+
+    return False
+
+
+def fin_linger(data):
+    """ Seconds a receiver waits for repeated FINs after answering one
+    with the given data: the attempts the sender has left. """
+
+    if len(data) < 2:
+        return FIN_LINGER
+
+    return min(FIN_ATTEMPTS * struct.unpack('>H', data[:2])[0] / 1000.0, FIN_LINGER)
+
+
+class Session:
+    """ Parameters of one transfer, agreed with the SYN handshake: the
+    size and MD5 digest of the file, the frames in flight (window), the
+    codec and the FEC parity frames per block (0 for none).
+
+    status is SESSION_ACCEPT or the reason the receiver gave to reject
+    the file; reply is the FRAME_SYN_ACK the receiver sent. """
+
+    def __init__(self, size, digest, window=1, codec=CODEC_RAW, fec=0, version=SESSION_VERSION):
+        self.size = size
+        self.digest = digest
+        self.window = window
+        self.codec = codec
+        self.fec = fec
+        self.version = version
+        self.status = SESSION_ACCEPT
+        self.reply = None
+
+    def error(self):
+        """ Description of the status, None if the session was accepted. """
+
+        if self.status == SESSION_ACCEPT:
+            return None
+
+        return SESSION_ERRORS.get(self.status, "unknown error " + str(self.status))
+
+
+def open_session(radio, session, stats=None):
+    """ Sends the FRAME_SYN of the session and waits for the FRAME_SYN_ACK
+    of the receiver. The session takes the status and the parameters it
+    agreed to; the data frames follow with sequence number 0. It
+    returns the session. """
+
+    data = SESSION_SYN.pack(session.version, session.size, session.digest, session.window, session.codec,
+                            session.fec)
+    reply = send_reliable(radio, FRAME_SYN, SESSION_SEQ, data, answer=FRAME_SYN_ACK, stats=stats)
+    session.status, session.window, session.codec, session.fec = SESSION_SYN_ACK.unpack(reply[:SESSION_SYN_ACK.size])
+
+    return session
+
+
+def accept_session(radio, check=None, window=1, codecs=(CODEC_RAW,), fec=0):
+    """ Waits for the FRAME_SYN of a sender and answers it with a
+    FRAME_SYN_ACK. The window and FEC parity are the smaller of the
+    proposed and our own; an unknown codec falls back to CODEC_RAW.
+
+    check(size, digest) can reject the file early, returning one of the
+    SESSION_* errors instead of SESSION_ACCEPT (no room, already there).
+    Rejected senders are answered and we keep waiting for another SYN.
+    It returns the accepted Session; give it to receive_stream(), which
+    answers the SYN again if our FRAME_SYN_ACK got lost. """
+
+    while True:
+        radio.startListening()
+        wait_for_data(radio)
+        frame = parse_frame(read_packet(radio))
+        radio.stopListening()
+        if frame is None or frame[0] != FRAME_SYN or len(frame[2]) < SESSION_SYN.size:
+            continue
+
+        version, size, digest, their_window, codec, their_fec = SESSION_SYN.unpack(frame[2][:SESSION_SYN.size])
+        session = Session(size, digest, min(window, their_window), codec if codec in codecs else CODEC_RAW,
+                          min(fec, their_fec), version)
+        if version != SESSION_VERSION:
+            session.status = SESSION_BAD_VERSION
+        elif check:
+            session.status = check(size, digest)
+
+        session.reply = build_frame(FRAME_SYN_ACK, frame[1], SESSION_SYN_ACK.pack(session.status, session.window,
+                                                                                 session.codec, session.fec))
+        send_packet(radio, session.reply)
+        if session.status == SESSION_ACCEPT:
+            return session
+        print("Rejected a file of " + str(size) + " bytes: " + session.error())
+
+
+def receive_stream(radio, fallback=None, blacklist=0, stats=None, session=None):
+    """ Generator that receives FRAME_DATA frames using STOP&WAIT and
+    yields their data in order, without duplicates.
+
+    Every good frame is acknowledged, corrupted ones get a FRAME_NAK.
+    FRAME_RATE frames move the radio to the data rate and PA level they
+    carry; after RATE_FALLBACK seconds of silence it goes back to the
+    fallback (data rate, PA level), where the sender will look for it.
+    FRAME_HOP frames start frequency hopping, our own blacklist goes
+    back in the ACK. While hopping, HOP_RESYNC seconds of silence make
+    the radio alternate with the channel of the last ACK, in case it was
+    lost and the sender is still repeating the previous frame there.
+    Every frame received is reported to the LinkStats, if there is one.
+    With the Session of accept_session() a repeated SYN is answered again.
+    The generator ends when the sender closes the stream with FRAME_FIN,
+    or after RECEIVE_IDLE seconds without hearing from it. """
+
+    expected = 0
+    finished = False
+    switched = False
+    hopper = None
+    last_ack = session.reply if session else None
+    linger = FIN_LINGER
+    ack_channel = None
+    last_heard = time.time() if session else None
+    while True:
+        timeout = None
+        if finished:
+            timeout = linger
+        else:
+            if last_heard is not None:
+                timeout = RECEIVE_IDLE
+            if switched and fallback:
+                timeout = RATE_FALLBACK
+            if hopper and ack_channel != hopper.channel():
+                timeout = min(timeout or HOP_RESYNC, HOP_RESYNC)
+
+        radio.startListening()
+        if not wait_for_data(radio, timeout):
+            radio.stopListening()
+            if finished:
+                break
+            if last_heard is not None and time.time() - last_heard >= RECEIVE_IDLE:
+                print("Nothing from the sender in " + str(RECEIVE_IDLE) + " seconds, it is gone")
+                break
+            if hopper and ack_channel != hopper.channel():
+                if hopper.current == ack_channel:
+                    hopper.tune(radio)
+                else:
+                    radio.setChannel(ack_channel)
+                    hopper.current = ack_channel
+            if switched and fallback and time.time() - last_heard >= RATE_FALLBACK:
+                print("Link lost, back to the initial data rate")
+                radio.setDataRate(fallback[0])
+                radio.setPALevel(fallback[1])
+                switched = False
+            continue
+        frame = parse_frame(read_packet(radio))
+        radio.stopListening()
+        if stats:
+            stats.on_frame(frame is not None, len(frame[2]) if frame else 0)
+
+        if frame is None:
+            send_packet(radio, build_frame(FRAME_NAK, expected))
+            continue
+
+        last_heard = time.time()
+        frame_type, seq, data = frame
+        if frame_type == FRAME_FIN:
+            send_packet(radio, build_frame(FRAME_FIN_ACK, seq))
+            finished = True
+            linger = fin_linger(data)
+            continue
+        elif finished:
+            continue
+        elif seq == expected:
+            ack_data = b''
+            if frame_type == FRAME_HOP:
+                ack_data = blacklist_bytes(blacklist)
+            last_ack = build_frame(FRAME_ACK, seq, ack_data)
+            send_packet(radio, last_ack)
+            ack_channel = hopper.current if hopper else None
+            expected = (expected + 1) & 0xff
+
+            if hopper:
+                hopper.frames += 1
+            if frame_type == FRAME_RATE:
+                # Switch only once the ACK is out with the old settings
+                radio.setDataRate(data[0])
+                radio.setPALevel(data[1])
+                switched = True
+            elif frame_type == FRAME_HOP:
+                channel = hopper.current if hopper else radio.getChannel()
+                hopper = HopSequence(struct.unpack('>I', data[:4])[0], blacklist | blacklist_from_bytes(data[4:]))
+                hopper.current = ack_channel = channel
+            else:
+                yield data
+        elif seq == (expected - 1) & 0xff and last_ack:
+            # Our ACK got lost, the sender is repeating the last frame
+            send_packet(radio, last_ack)
+            if frame_type == FRAME_RATE:
+                # We may have gone back to the fallback since, switch again
+                radio.setDataRate(data[0])
+                radio.setPALevel(data[1])
+                switched = True
+
+        if hopper:
+            hopper.tune(radio)
+
+
+def blacklist_bytes(blacklist):
+    """ Packs a channel bitmap (bit n set = channel n blacklisted). """
+
+    return blacklist.to_bytes(16, 'big')
+
+
+def blacklist_from_bytes(data):
+    """ Unpacks a channel bitmap packed by blacklist_bytes(). """
+
+    return int.from_bytes(bytes(data[:16]), 'big')
+
+
+def scan_channels(radio, samples=8):
+    """ Listens on every hopping channel looking for other transmitters
+    with the Received Power Detector. It returns the bitmap of the channels
+    busy in more than HOP_RPD_LIMIT of the samples. """
+
+    busy = 0
+    channel = radio.getChannel()
+    for candidate in HOP_CHANNELS:
+        radio.setChannel(candidate)
+        hits = 0
+        for i in range(samples):
+            radio.startListening()
+            # RPD is only valid 170us after entering RX, startListening() waits 130us
+            lib_timing.delay_us(40)
+            hits += radio.testRPD()
+            radio.stopListening()
+        if hits > samples * HOP_RPD_LIMIT:
+            busy |= 1 << candidate
+
+    radio.setChannel(channel)
+    return busy
+
+
+class HopSequence:
+    """ Pseudo-random frequency hopping schedule shared by both ends.
+
+    The channels of HOP_CHANNELS that are not blacklisted are shuffled
+    with the session seed and the radio moves to the next one every
+    HOP_DWELL frames, counting from the last FRAME_HOP. The sender also
+    keeps the loss of every channel so lossy ones can be blacklisted. """
+
+    def __init__(self, seed, blacklist=0):
+        self.seed = seed
+        self.current = None
+        self.restart(blacklist)
+
+    def restart(self, blacklist):
+        """ Rebuilds the schedule for a new blacklist, from frame 0. """
+
+        allowed = [channel for channel in HOP_CHANNELS if not blacklist >> channel & 1]
+        if len(allowed) < HOP_MIN_CHANNELS:
+            allowed = list(HOP_CHANNELS)
+        random.Random(self.seed).shuffle(allowed)
+
+        self.blacklist = blacklist
+        self.order = allowed
+        self.frames = 0
+        self.stats = dict()
+
+    def channel(self, frame=None):
+        """ Channel for the given frame number, by default the next one. """
+
+        if frame is None:
+            frame = self.frames
+        return self.order[(frame // HOP_DWELL) % len(self.order)]
+
+    def tune(self, radio):
+        """ Moves the radio to the channel of the next frame. """
+
+        channel = self.channel()
+        if channel != self.current:
+            radio.setChannel(channel)
+            self.current = channel
+
+    def on_attempt(self, acked, nak, length):
+        attempts, failures = self.stats.get(self.current, (0, 0))
+        self.stats[self.current] = (attempts + 1, failures + (not acked))
+
+    def lossy_channel(self):
+        """ A channel that loses more than HOP_MAX_LOSS of the frames,
+        if blacklisting it still leaves HOP_MIN_CHANNELS to hop on. """
+
+        if len(self.order) <= HOP_MIN_CHANNELS:
+            return None
+        for channel, (attempts, failures) in self.stats.items():
+            if attempts >= HOP_MIN_ATTEMPTS and failures > attempts * HOP_MAX_LOSS:
+                return channel
+
+        return None
+
+
+class TokenBucket:
+    """ Paces the sender: rate tokens per second are added to the bucket,
+    at most depth of them are saved up, and every frame takes one. """
+
+    def __init__(self, rate, depth):
+        self.rate = rate
+        self.depth = depth
+        self.tokens = depth
+        self.stamp = time.perf_counter()
+
+    def _refill(self):
+        now = time.perf_counter()
+        self.tokens = min(self.depth, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self):
+        """ Waits until there is a token and takes it. """
+
+        self._refill()
+        if self.tokens < 1:
+            time.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+def send_flow_stream(radio, chunks, seq=0, stats=None):
+    """ Sends every chunk as a FRAME_DATA without waiting for each ACK,
+    paced by a TokenBucket and never beyond the credit the receiver gave.
+
+    Every few frames (up to FLOW_POLL, fewer when the LinkStats sees
+    losses), or when the credit runs out, a FRAME_CREDIT_REQUEST asks the receiver for the next sequence number it
+    expects, the room left in its buffer and how fast it is consuming.
+    Lost frames are sent again from the first missing one. Losing more
+    than the odd frame means the receiver could not keep up and slows the
+    pacing down. While the buffer of the receiver stays mostly empty the
+    pacing grows; once it fills up the pacing follows the rate at which
+    the receiver consumes the data.
+    It returns the next free sequence number. """
+
+    if stats is None:
+        stats = lib_linkstats.LinkStats(radio)
+    chunks = iter(chunks)
+    bucket = TokenBucket(FLOW_INITIAL_RATE, FLOW_BURST)
+    # Frames sent but not confirmed yet, the first one has sequence number base
+    window = collections.deque()
+    base = seq
+    sent = 0
+    credit = 0
+    since_poll = 0
+    poll = 0
+    exhausted = False
+    while True:
+        while not exhausted and len(window) < credit:
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                window.append(build_frame(FRAME_DATA, (base + len(window)) & 0xff, chunk))
+        if exhausted and not window:
+            return base
+
+        if sent < min(len(window), credit) and since_poll < stats.window(FLOW_MIN_POLL, FLOW_POLL):
+            bucket.take()
+            send_packet(radio, window[sent])
+            sent += 1
+            since_poll += 1
+            continue
+
+        started = time.time()
+        reply, nak = try_send(radio, build_frame(FRAME_CREDIT_REQUEST, poll), poll, FRAME_CREDIT, stats.timeout())
+        poll = (poll + 1) & 0xff
+        since_poll = 0
+        if reply is None:
+            continue
+        stats.on_rtt(time.time() - started)
+
+        confirmed = (reply[0] - base) & 0xff
+        if confirmed > sent:
+            # Answer to an older request
+            continue
+        for i in range(confirmed):
+            window.popleft()
+        base = reply[0]
+        credit = reply[1]
+        # Frames after a gap arrive but are dropped, only the rest got lost
+        lost = max(0, sent - confirmed - reply[2])
+        stats.on_block(sent, sent - lost, DATA_SIZE)
+        consumption = struct.unpack('>H', reply[3:5])[0]
+        if lost > max(1, sent * FLOW_MAX_LOSS):
+            bucket.rate = max(FLOW_MIN_RATE, bucket.rate * FLOW_BACKOFF)
+        elif credit < FLOW_BUFFER // 2:
+            bucket.rate = max(FLOW_MIN_RATE, consumption)
+        else:
+            bucket.rate = min(FLOW_MAX_RATE, bucket.rate * FLOW_PROBE)
+        sent = 0
+        if not credit:
+            time.sleep(FLOW_IDLE)
+
+
+class FlowReceiver:
+    """ Receiving side of send_flow_stream(). A thread keeps the radio in
+    RX mode and moves every frame from its 3 frame FIFO into a buffer of
+    FLOW_BUFFER frames as soon as it arrives, so the time the application
+    spends with the data does not overrun the FIFO. Iterating the object
+    gives the data of the frames in order, the free room of the buffer and
+    the rate at which the application takes the data are what the credit
+    answers report. Iteration ends when the sender closes the stream, or
+    after RECEIVE_IDLE seconds without hearing from it. """
+
+    def __init__(self, radio, size=FLOW_BUFFER):
+        self.radio = radio
+        self.size = size
+        self.buffer = collections.deque()
+        self.ready = threading.Condition()
+        self.expected = 0
+        self.consumed = 0
+        self.consumed_since = time.time()
+        self.dropped = 0
+        self.finished = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _credit(self, poll):
+        """ Builds the answer to a FRAME_CREDIT_REQUEST. """
+
+        with self.ready:
+            free = self.size - len(self.buffer)
+            now = time.time()
+            rate = self.consumed / max(now - self.consumed_since, 0.001)
+            self.consumed = 0
+            self.consumed_since = now
+            dropped = min(self.dropped, 0xff)
+            self.dropped = 0
+
+        return build_frame(FRAME_CREDIT, poll, bytes([self.expected, free, dropped]) + struct.pack('>H', min(int(rate), 0xffff)))
+
+    def _reply(self, frame):
+        self.radio.stopListening()
+        send_packet(self.radio, frame)
+        self.radio.startListening()
+
+    def _run(self):
+        linger = None
+        heard = False
+        self.radio.startListening()
+        while wait_for_data(self.radio, linger if linger is not None else (RECEIVE_IDLE if heard else None)):
+            heard = True
+            frame = parse_frame(read_packet(self.radio))
+            if frame is None:
+                continue
+
+            frame_type, seq, data = frame
+            if frame_type == FRAME_DATA and linger is None:
+                with self.ready:
+                    if seq == self.expected and len(self.buffer) < self.size:
+                        self.buffer.append(data)
+                        self.expected = (self.expected + 1) & 0xff
+                        self.ready.notify()
+                    else:
+                        self.dropped += 1
+            elif frame_type == FRAME_CREDIT_REQUEST:
+                self._reply(self._credit(seq))
+            elif frame_type == FRAME_FIN:
+                self._reply(build_frame(FRAME_FIN_ACK, seq))
+                linger = fin_linger(data)
+        self.radio.stopListening()
+        if linger is None:
+            print("Nothing from the sender in " + str(RECEIVE_IDLE) + " seconds, it is gone")
+
+        with self.ready:
+            self.finished = True
+            self.ready.notify()
+
+    def __iter__(self):
+        self.thread.start()
+        while True:
+            with self.ready:
+                while not self.buffer and not self.finished:
+                    self.ready.wait()
+                if not self.buffer:
+                    return
+                data = self.buffer.popleft()
+                self.consumed += 1
+            yield data
+
+
+def send_sack_stream(radio, chunks, seq=0, window=SACK_BURST, stats=None):
+    """ Sends every chunk of data as a FRAME_DATA in bursts, with one
+    acknowledgement per burst instead of one per frame (see
+    send_sack_frames()). It returns the next free sequence number. """
+
+    frames = (build_frame(FRAME_DATA, number, chunk) for number, chunk in enumerate(chunks, seq))
+    return send_sack_frames(radio, frames, seq, window, stats)
+
+
+def send_sack_frames(radio, frames, seq=0, window=SACK_BURST, stats=None):
+    """ Sends FRAME_DATA frames already built, numbered from seq on, in
+    bursts. The last frame of a burst goes out as a FRAME_DATA_POLL and
+    the FRAME_SACK that answers it tells which frames arrived; the next
+    burst resends the missing ones first and then goes on with new data,
+    never more than SACK_WINDOW frames past the first missing one. Bursts
+    are up to window frames, fewer when the LinkStats sees losses. If no
+    FRAME_SACK arrives the first missing frame is sent alone as a poll.
+    It returns the next free sequence number. """
+
+    frames = iter(frames)
+    pending = collections.OrderedDict()
+    base = seq
+    top = seq
+    more = True
+    burst_size = window
+    while pending or more:
+        while more and top - base < SACK_WINDOW:
+            frame = next(frames, None)
+            if frame is None:
+                more = False
+            else:
+                pending[top] = frame
+                top += 1
+
+        if not pending:
+            break
+        burst = list(pending)[:burst_size]
+        for number in burst[:-1]:
+            send_packet(radio, pending[number])
+        # Only the poll has to be built again, with its own type and CRC
+        send_packet(radio, build_frame(FRAME_DATA_POLL, burst[-1], pending[burst[-1]][HEADER_SIZE:-CRC_SIZE]))
+        polled = time.time()
+
+        reply = None
+        timeout = (stats.timeout() if stats else ACK_TIMEOUT) + SACK_DELAY
+        radio.startListening()
+        while wait_for_data(radio, polled + timeout - time.time()):
+            reply = parse_frame(read_packet(radio))
+            if reply is not None and reply[0] == FRAME_SACK:
+                break
+            reply = None
+        radio.stopListening()
+
+        # An answer that points past the frames sent is not for this stream
+        if reply is not None and (reply[1] - base) & 0xff > top - base:
+            reply = None
+        if reply is None:
+            for number in burst:
+                if stats:
+                    stats.on_attempt(False, False, len(pending[number]) - HEADER_SIZE - CRC_SIZE)
+            burst_size = 1
+            continue
+
+        # Everything before the expected frame is in, and so is every frame in the bitmap
+        expected = base + ((reply[1] - base) & 0xff)
+        bitmap = int.from_bytes(reply[2][:SACK_WINDOW // 8], 'big')
+        delivered = set(number for number in pending if number < expected or
+                        (number > expected and bitmap >> (number - expected - 1) & 1))
+        for number in burst:
+            if stats:
+                stats.on_attempt(number in delivered, False, len(pending[number]) - HEADER_SIZE - CRC_SIZE)
+        for number in delivered:
+            del pending[number]
+        base = max(base, expected)
+        if stats:
+            stats.on_rtt(time.time() - polled)
+        burst_size = stats.window(SACK_MIN_BURST, window) if stats else window
+        burst_size = min(burst_size, window)
+
+    return base & 0xff
+
+
+def receive_sack_stream(radio, stats=None, session=None):
+    """ Generator that receives the frames of send_sack_stream() and
+    yields their data in order. The radio stays in RX during a burst,
+    frames ahead of the expected one are held, and only a
+    FRAME_DATA_POLL (or SACK_DELAY seconds of silence after frames that
+    have not been acknowledged) makes it answer with a FRAME_SACK. With
+    the Session of accept_session() a repeated SYN is answered again.
+    The generator ends when the sender closes the stream with FRAME_FIN,
+    or after RECEIVE_IDLE seconds without hearing from it. """
+
+    expected = 0
+    held = dict()
+    unacked = 0
+    linger = None
+    last_heard = time.time() if session else None
+    radio.startListening()
+    while True:
+        timeout = linger if linger is not None else (SACK_DELAY if unacked else None)
+        if timeout is None and last_heard is not None:
+            timeout = RECEIVE_IDLE
+        if not wait_for_data(radio, timeout):
+            if linger is not None:
+                break
+            if not unacked:
+                print("Nothing from the sender in " + str(RECEIVE_IDLE) + " seconds, it is gone")
+                break
+            answer = build_frame(FRAME_SACK, expected, sack_bitmap(expected, held))
+        else:
+            last_heard = time.time()
+            frame = parse_frame(read_packet(radio))
+            if stats:
+                stats.on_frame(frame is not None, len(frame[2]) if frame else 0)
+            if frame is None:
+                unacked += 1
+                continue
+
+            frame_type, seq, data = frame
+            answer = None
+            if frame_type == FRAME_FIN:
+                answer = build_frame(FRAME_FIN_ACK, seq)
+                linger = fin_linger(data)
+            elif frame_type == FRAME_SYN and session:
+                answer = session.reply
+            elif frame_type in (FRAME_DATA, FRAME_DATA_POLL) and linger is None:
+                unacked += 1
+                offset = (seq - expected) & 0xff
+                if offset == 0:
+                    yield data
+                    expected = (expected + 1) & 0xff
+                    while expected in held:
+                        yield held.pop(expected)
+                        expected = (expected + 1) & 0xff
+                elif offset <= SACK_WINDOW:
+                    held[seq] = data
+                if frame_type == FRAME_DATA_POLL:
+                    answer = build_frame(FRAME_SACK, expected, sack_bitmap(expected, held))
+            if answer is None:
+                continue
+
+        radio.stopListening()
+        send_packet(radio, answer)
+        radio.startListening()
+        unacked = 0
+    radio.stopListening()
+
+
+def sack_bitmap(expected, held):
+    """ Packs the frames held after the expected one into the bitmap of
+    a FRAME_SACK: bit n set = frame expected + 1 + n received. """
+
+    bitmap = 0
+    for seq in held:
+        bitmap |= 1 << ((seq - expected) & 0xff) - 1
+
+    return bitmap.to_bytes(SACK_WINDOW // 8, 'big')
+
+
+def ackpay_profile(channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN):
+    """ Register profile for the ACK payload mode: auto-ack with
+    retransmissions, dynamic payloads and ACK payloads. """
+
+    return NRF24.makeProfile(channel=channel, data_rate=data_rate, pa_level=pa_level, retries=ACKPAY_RETRIES,
+                             auto_ack=True, dynamic_payloads=True, ack_payload=True)
+
+
+def send_ackpay_stream(radio, chunks, seq=0, stats=None):
+    """ Sends every chunk of data as a FRAME_DATA without ever switching
+    to RX: the radio retransmits until the hardware ACK arrives, and that
+    ACK carries the report of the receiver, a FRAME_ACK with the next
+    sequence number it expects and a counter of the gaps it has seen.
+
+    The report was loaded before our frame arrived, so it lags behind;
+    frames stay in the window until a report covers them. When the gap
+    counter moves the sender goes back to the expected frame (go-back-N).
+    With the window full, or at the end, the last frame is sent again to
+    fetch a newer report. It returns the next free sequence number. """
+
+    chunks = iter(chunks)
+    window = collections.deque()
+    base = seq
+    position = 0
+    gaps = None
+    more = True
+    while True:
+        if position == len(window) and more and len(window) < ACKPAY_WINDOW:
+            chunk = next(chunks, None)
+            if chunk is None:
+                more = False
+            else:
+                window.append(build_frame(FRAME_DATA, base + len(window), chunk))
+        if not window and not more:
+            break
+
+        probe = position == len(window)
+        frame = window[-1] if probe else window[position]
+        started = time.time()
+        acked = radio.write(frame)
+        report = None
+        if radio.isAckPayloadAvailable():
+            report = parse_frame(read_packet(radio))
+
+        rewind = False
+        if report is not None and report[0] == FRAME_ACK and report[2]:
+            expected, count = report[1], report[2][0]
+            confirmed = (expected - base) & 0xff
+            if confirmed <= len(window):
+                for i in range(confirmed):
+                    window.popleft()
+                base = expected
+                position = max(position - confirmed, 0)
+                rewind = gaps is not None and count != gaps
+                gaps = count
+        if stats:
+            stats.on_attempt(acked, rewind, len(frame) - HEADER_SIZE - CRC_SIZE, time.time() - started)
+
+        if rewind:
+            position = 0
+        elif acked and not probe:
+            position += 1
+        elif probe and report is None:
+            time.sleep(ACKPAY_IDLE)
+
+    return base
+
+
+def finish_ackpay_stream(radio, seq):
+    """ Closes a send_ackpay_stream() with a FRAME_FIN, delivered when
+    its hardware ACK arrives. The FIN carries the time the radio spends
+    on one frame, so the receiver lingers for FIN_ATTEMPTS of them. """
+
+    timeout = radio.getMaxTimeout()
+    frame = build_frame(FRAME_FIN, seq, struct.pack('>H', min(int(timeout * 1000) + 1, 0xffff)))
+    for attempt in range(FIN_ATTEMPTS):
+        if radio.write(frame):
+            return True
+
+    return False
+
+
+def receive_ackpay_stream(radio, stats=None):
+    """ Generator that receives the frames of send_ackpay_stream() and
+    yields their data in order. The radio stays in RX: after every frame
+    our report is loaded into the ACK payload FIFO, to leave with the
+    hardware ACK of the next one. A corrupted frame, or one ahead of the
+    expected, opens a gap and moves the gap counter; later frames are
+    dropped until the expected one comes again. Frames behind it are
+    repeats and are ignored. The generator ends after the FRAME_FIN, or
+    after RECEIVE_IDLE seconds without hearing from the sender. """
+
+    expected = 0
+    gaps = 0
+    gap = False
+    linger = None
+    heard = False
+    radio.startListening()
+    report = build_frame(FRAME_ACK, expected, bytes([gaps]))
+    radio.writeAckPayload(ACKPAY_PIPE, report, len(report))
+    while wait_for_data(radio, linger if linger is not None else (RECEIVE_IDLE if heard else None)):
+        heard = True
+        frame = parse_frame(read_packet(radio))
+        if stats:
+            stats.on_frame(frame is not None, len(frame[2]) if frame else 0)
+
+        data = None
+        if frame is None:
+            if not gap:
+                gap = True
+                gaps = (gaps + 1) & 0xff
+        elif frame[0] == FRAME_FIN:
+            linger = fin_linger(frame[2])
+        elif frame[0] == FRAME_DATA and linger is None:
+            if frame[1] == expected:
+                expected = (expected + 1) & 0xff
+                gap = False
+                data = frame[2]
+            elif (frame[1] - expected) & 0xff < 0x80 and not gap:
+                gap = True
+                gaps = (gaps + 1) & 0xff
+
+        report = build_frame(FRAME_ACK, expected, bytes([gaps]))
+        radio.writeAckPayload(ACKPAY_PIPE, report, len(report))
+        if data is not None:
+            yield data
+    radio.stopListening()
+    if linger is None:
+        print("Nothing from the sender in " + str(RECEIVE_IDLE) + " seconds, it is gone")
+
+
+class RateController:
+    """ Chooses the step of the rate ladder (data rate, PA level) used
+    by send_stream() from what it observes on the link.
+
+    After every window of attempts it looks at the delivery ratio, the
+    CRC failures reported with FRAME_NAK and the lost packet counter of
+    OBSERVE_TX: a bad window moves one step towards the robust end, a
+    run of good windows probes one step faster. A probe that does not
+    improve the goodput is undone, and the next probe of that step
+    waits twice as many good windows. """
+
+    def __init__(self, radio, ladder=None, start=RATE_START, window=RATE_WINDOW):
+        self.radio = radio
+        self.ladder = ladder or RATE_LADDER
+        self.base = start
+        self.step = start
+        self.window = window
+        self.failures = 0
+        self.last_ack = time.time()
+        self.good_windows = 0
+        # Good windows needed before probing each step, doubled every time it fails
+        self.hold = [1] * len(self.ladder)
+        self.probe = None
+        self._reset_window()
+
+    def _reset_window(self):
+        self.attempts = 0
+        self.acks = 0
+        self.naks = 0
+        self.bytes = 0
+        self.window_start = time.time()
+
+    def apply(self, step):
+        """ Configures the radio for the given step of the ladder. """
+
+        if step != self.step:
+            data_rate, pa_level = self.ladder[step]
+            self.radio.setDataRate(data_rate)
+            self.radio.setPALevel(pa_level)
+            self.step = step
+
+    def on_attempt(self, acked, nak, length):
+        """ Records the outcome of one transmission. Failures for as long
+        as the receiver waits before going back to the initial step (the
+        ACK timeout may be much shorter) mean it probably has, so the
+        sender does the same. """
+
+        self.attempts += 1
+        if acked:
+            self.acks += 1
+            self.bytes += length
+            self.failures = 0
+            self.last_ack = time.time()
+            return
+
+        if nak:
+            self.naks += 1
+        self.failures += 1
+        if self.failures >= RATE_FALLBACK_ATTEMPTS and time.time() - self.last_ack >= RATE_FALLBACK \
+                and self.step != self.base:
+            print("Link lost, back to the initial data rate")
+            self.hold[self.step] *= 2
+            self.apply(self.base)
+            self.probe = None
+            self.failures = 0
+
+    def next_step(self):
+        """ At the end of a window returns the step send_stream() should
+        switch to, or None to stay where we are. """
+
+        if self.attempts < self.window:
+            return None
+
+        delivery = self.acks / float(self.attempts)
+        crc_failures = self.naks / float(self.attempts)
+        goodput = self.bytes / max(time.time() - self.window_start, 0.001)
+
+        # Packets lost after all the retries, only counted with auto-ack enabled.
+        # Writing RF_CH clears the counter.
+        lost = self.radio.read_register(NRF24.OBSERVE_TX) >> NRF24.PLOS_CNT
+        if lost:
+            self.radio.setChannel(self.radio.getChannel())
+        self._reset_window()
+
+        if self.probe is not None:
+            previous_step, previous_goodput = self.probe
+            self.probe = None
+            if goodput < previous_goodput:
+                self.hold[self.step] *= 2
+                return previous_step
+            self.hold[self.step] = 1
+
+        if (delivery < RATE_DOWN or crc_failures > RATE_MAX_CRC or lost) and self.step > 0:
+            self.good_windows = 0
+            return self.step - 1
+
+        if delivery >= RATE_UP:
+            self.good_windows += 1
+            if self.step < len(self.ladder) - 1 and self.good_windows >= self.hold[self.step + 1]:
+                self.good_windows = 0
+                self.probe = (self.step, goodput)
+                return self.step + 1
+        else:
+            self.good_windows = 0
+
+        return None
+
+
+class StreamMux:
+    """ Multiplexes several logical streams over one send_stream().
+
+    Every stream has a priority, lower goes first. For every frame the
+    most urgent stream with something to send gives its next piece and
+    streams of the same priority take turns, so a short message never waits
+    for more than the frame already on the air. Messages are queued with
+    send(), from any thread; bulk data is attached as an iterable and only
+    read a frame at a time, when nothing more urgent is waiting.
+
+    Iterating the mux gives the frame payloads for send_stream(). It waits
+    for new messages while the streams are empty and ends once close() has
+    been called and everything queued has been sent. """
+
+    def __init__(self):
+        self.streams = dict()
+        self.sent = dict()
+        self.last = -1
+        self.closed = False
+        self.ready = threading.Condition()
+
+    def open(self, stream_id, priority):
+        """ Adds a stream (0-127) with the given priority. """
+
+        with self.ready:
+            self.streams[stream_id] = {'priority': priority, 'queue': collections.deque(),
+                                       'source': None, 'next': None}
+            self.sent[stream_id] = 0
+
+    def send(self, stream_id, message):
+        """ Queues a message, split in as many frames as it needs. """
+
+        pieces = [message[i:i + MUX_DATA_SIZE] for i in range(0, len(message), MUX_DATA_SIZE)] or [b'']
+        with self.ready:
+            queue = self.streams[stream_id]['queue']
+            for i, piece in enumerate(pieces):
+                queue.append((piece, i == len(pieces) - 1))
+            self.ready.notify_all()
+
+    def attach(self, stream_id, chunks):
+        """ Sends the byte strings of chunks as one long message. """
+
+        source = chunked(chunks, MUX_DATA_SIZE)
+        first = next(source, b'')
+        with self.ready:
+            stream = self.streams[stream_id]
+            stream['source'] = source
+            stream['next'] = first
+            self.ready.notify_all()
+
+    def drained(self, stream_id, timeout=None):
+        """ Waits up to timeout seconds for everything queued and attached
+        on the stream to be taken, and returns True if it was. """
+
+        with self.ready:
+            stream = self.streams[stream_id]
+            return self.ready.wait_for(lambda: not stream['queue'] and not stream['source'], timeout)
+
+    def close(self):
+        """ Ends the iteration once every stream has been drained. """
+
+        with self.ready:
+            self.closed = True
+            self.ready.notify_all()
+
+    def _next_stream(self):
+        """ Chooses the most urgent stream with something to send, or None. """
+
+        waiting = [stream_id for stream_id, stream in self.streams.items()
+                   if stream['queue'] or stream['source']]
+        if not waiting:
+            return None
+
+        priority = min(self.streams[stream_id]['priority'] for stream_id in waiting)
+        candidates = sorted(stream_id for stream_id in waiting if self.streams[stream_id]['priority'] == priority)
+        stream_id = ([candidate for candidate in candidates if candidate > self.last] or candidates)[0]
+        self.last = stream_id
+
+        return stream_id
+
+    def __iter__(self):
+        while True:
+            source = None
+            with self.ready:
+                stream_id = self._next_stream()
+                while stream_id is None:
+                    if self.closed:
+                        return
+                    self.ready.wait()
+                    stream_id = self._next_stream()
+                stream = self.streams[stream_id]
+                if stream['queue']:
+                    piece, end = stream['queue'].popleft()
+                else:
+                    piece, source = stream['next'], stream['source']
+
+            if source is not None:
+                # Read outside the lock, send() does not wait for the file
+                following = next(source, None)
+                end = following is None
+                with self.ready:
+                    stream['next'] = following
+                    if end:
+                        stream['source'] = None
+                        self.ready.notify_all()
+
+            self.sent[stream_id] += len(piece)
+            yield bytes([stream_id | (MUX_END if end else 0)]) + piece
+
+
+def demux(pieces):
+    """ Generator that splits the data of receive_stream() back into
+    (stream id, data, end of message) tuples. """
+
+    for data in pieces:
+        yield data[0] & ~MUX_END, data[1:], bool(data[0] & MUX_END)
+
+
+def chunked(stream, size=DATA_SIZE):
+    """ Regroups the byte strings of stream into chunks of exactly size
+    bytes (the last one may be shorter), so that consecutive files are
+    packed back-to-back into the same frames.
+
+    Chunks that lie inside one piece are memoryview slices of it, no
+    copy is made; only chunks that span two pieces are new bytes. """
+
+    pending = bytearray()
+    for piece in stream:
+        piece = memoryview(piece)
+        start = 0
+        if pending:
+            start = min(size - len(pending), len(piece))
+            pending += piece[:start]
+            if len(pending) < size:
+                continue
+            yield bytes(pending)
+            pending = bytearray()
+
+        end = start + (len(piece) - start) // size * size
+        for offset in range(start, end, size):
+            yield piece[offset:offset + size]
+        pending += piece[end:]
+
+    if pending:
+        yield bytes(pending)
+
+
+def mapped_file(file_path):
+    """ Maps the file into memory and returns a read-only memoryview of
+    its contents. Pages are read by the kernel as they are touched, with
+    sequential readahead, so files larger than the RAM work too. The
+    mapping goes away with the last view of it. """
+
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b'')
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if hasattr(mapped, 'madvise'):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+    return memoryview(mapped)
+
+
+def file_digest(file_path):
+    """ Returns the MD5 digest of the file contents. """
+
+    return hashlib.md5(mapped_file(file_path)).digest()
+
+
+def collect_files(paths):
+    """ Expands the given files and directories into a list of
+    (name, path) tuples. Files inside a directory keep the name of the
+    directory and their path inside it, so the receiver can recreate
+    the tree. Two files that would get the same name (a/x and b/x) are
+    told apart with a numeric suffix, never written over each other. """
+
+    entries = list()
+    names = set()
+
+    def add(name, path):
+        unique = name
+        copy = 1
+        while unique in names:
+            copy += 1
+            unique = name + "." + str(copy)
+        if unique != name:
+            print("WARNING: " + path + " is sent as " + unique + ", " + name + " is taken")
+        names.add(unique)
+        entries.append((unique, path))
+
+    for path in paths:
+        if os.path.isdir(path):
+            top = os.path.basename(os.path.abspath(path))
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    full_path = os.path.join(root, name)
+                    rel_path = os.path.relpath(full_path, path).replace(os.sep, '/')
+                    add(top + '/' + rel_path if top else rel_path, full_path)
+        elif os.path.isfile(path):
+            add(os.path.basename(path), path)
+        else:
+            print("ERROR: file does not exist in PATH: " + path)
+
+    return entries
+
+
+def build_manifest(entries):
+    """ Builds the compact manifest for a list of (name, path) tuples:
+    the name, size and MD5 digest of every file. """
+
+    if len(set(name for name, path in entries)) != len(entries):
+        raise Exception("Two files with the same name in the batch")
+
+    manifest = MANIFEST_HEADER.pack(MANIFEST_MAGIC, len(entries))
+    for name, path in entries:
+        name = name.encode('utf-8')
+        manifest += MANIFEST_ENTRY.pack(len(name), os.path.getsize(path), file_digest(path)) + name
+
+    return manifest
+
+
+def parse_manifest(manifest):
+    """ Parses a manifest built by build_manifest() and returns
+    the list of (name, size, digest) tuples. """
+
+    magic, count = MANIFEST_HEADER.unpack_from(manifest, 0)
+    if magic != MANIFEST_MAGIC:
+        raise Exception("Not a batch manifest")
+
+    files = list()
+    offset = MANIFEST_HEADER.size
+    for i in range(count):
+        name_len, size, digest = MANIFEST_ENTRY.unpack_from(manifest, offset)
+        offset += MANIFEST_ENTRY.size
+        name = manifest[offset:offset + name_len].decode('utf-8')
+        offset += name_len
+        files.append((name, size, digest))
+
+    return files
+
+
+def batch_stream(entries):
+    """ Generator that yields the whole batch as one byte stream:
+    the manifest length, the manifest and then the contents of every
+    file back-to-back, each one as a view of the mapped file. """
+
+    manifest = build_manifest(entries)
+    yield struct.pack('>I', len(manifest))
+    yield manifest
+
+    for name, path in entries:
+        yield mapped_file(path)
+
+
+class BatchWriter:
+    """ Receives the byte stream produced by batch_stream() piece by
+    piece and recreates the files under the output directory. """
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.pending = b''
+        self.manifest_len = None
+        self.files = None
+        self.current = None
+        self.remaining = 0
+        self.digest = None
+        self.written = list()
+        self.failed = list()
+
+    def _safe_path(self, name):
+        """ Maps a manifest name into the output directory, refusing
+        names that would escape from it. """
+
+        parts = name.split('/')
+        if name.startswith('/') or '..' in parts or '' in parts:
+            raise Exception("Refusing unsafe file name in manifest: " + name)
+
+        return os.path.join(self.out_dir, *parts)
+
+    def _open_next(self):
+        """ Opens the next file of the manifest, closing empty files
+        right away since no data will arrive for them. """
+
+        while self.files and self.current is None:
+            name, size, digest = self.files.popleft()
+            path = self._safe_path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.current = (name, path, digest, open(path, 'wb'))
+            self.remaining = size
+            self.digest = hashlib.md5()
+            if size == 0:
+                self._close_current()
+
+    def _close_current(self):
+        name, path, digest, f = self.current
+        f.close()
+        self.current = None
+        if self.digest.digest() == digest:
+            print("Received " + name)
+            self.written.append(name)
+        else:
+            print("HASH incorrect for " + name)
+            self.failed.append(name)
+
+    def feed(self, data):
+        """ Adds the next piece of the batch stream. """
+
+        self.pending += data
+        if self.manifest_len is None:
+            if len(self.pending) < 4:
+                return
+            self.manifest_len = struct.unpack('>I', self.pending[:4])[0]
+            self.pending = self.pending[4:]
+
+        if self.files is None:
+            if len(self.pending) < self.manifest_len:
+                return
+            self.files = collections.deque(parse_manifest(self.pending[:self.manifest_len]))
+            self.pending = self.pending[self.manifest_len:]
+            print("Manifest received: " + str(len(self.files)) + " files")
+            self._open_next()
+
+        while self.pending and self.current is not None:
+            block = self.pending[:self.remaining]
+            self.pending = self.pending[len(block):]
+            self.current[3].write(block)
+            self.digest.update(block)
+            self.remaining -= len(block)
+            if self.remaining == 0:
+                self._close_current()
+                self._open_next()
+
+    def done(self):
+        """ True once the manifest and every file in it have arrived. """
+
+        return self.files is not None and not self.files and self.current is None
+
+
+def fec_pieces(chunks):
+    """ Generator that splits the stream into FEC_PAYLOAD pieces, as
+    (piece, last) tuples. The last piece is padded and its final byte
+    tells how much padding there is, so every frame has the same size. """
+
+    # The encoder works on bytes, not on views
+    pieces = chunked(chunks, FEC_PAYLOAD)
+    piece = bytes(next(pieces, b''))
+    for following in pieces:
+        yield piece, False
+        piece = bytes(following)
+
+    if len(piece) == FEC_PAYLOAD:
+        yield piece, False
+        piece = b''
+    pad = FEC_PAYLOAD - len(piece) - 1
+    yield piece + bytes(pad) + bytes([pad]), True
+
+
+def send_fec_block(radio, seq, data, last, stats):
+    """ Sends a block of data frames followed by as many parity frames as
+    the LinkStats loss estimate asks for, without waiting for ACKs. A FRAME_FEC_END
+    then asks the receiver how many more frames it needs to rebuild the
+    block; those are sent as new parity frames until it has enough.
+
+    It returns (frames sent, frames the receiver got). """
+
+    k = len(data)
+    flags = FEC_LAST if last else 0
+
+    def send_frames(first, count):
+        for n in range(first, first + count):
+            # Repairs cycle over the parity indexes that fit in the header
+            index = n if n <= FEC_MAX_INDEX else k + (n - k) % (FEC_MAX_INDEX + 1 - k)
+            payload = data[index] if index < k else lib_fec.parity(data, index)
+            send_packet(radio, build_frame(FRAME_FEC, seq, bytes([index | flags, k]) + payload))
+
+    sent = k + stats.parity(k)
+    send_frames(0, sent)
+
+    end = build_frame(FRAME_FEC_END, seq, bytes([k, last]))
+    while True:
+        started = time.time()
+        reply, nak = try_send(radio, end, seq, timeout=stats.timeout())
+        if reply is None:
+            continue
+        stats.on_rtt(time.time() - started)
+        received, needed = reply[0], reply[1]
+        if not needed:
+            return sent, received
+        send_frames(sent, needed)
+        sent += needed
+
+
+def send_fec_stream(radio, chunks, seq=0, stats=None):
+    """ Sends the stream with hybrid ARQ: blocks of FEC_K data frames with
+    parity frames, so the receiver repairs small losses without a round
+    trip. The parity per block follows the loss the receiver reports,
+    estimated by the LinkStats, and repairs on request (NACK) only cover
+    what the parity could not. It returns the next free sequence number. """
+
+    if stats is None:
+        stats = lib_linkstats.LinkStats(radio, FEC_INITIAL_LOSS)
+    block = list()
+    blocks = frames = data_frames = 0
+    for piece, last in fec_pieces(chunks):
+        block.append(piece)
+        if len(block) < FEC_K and not last:
+            continue
+
+        sent, received = send_fec_block(radio, seq, block, last, stats)
+        stats.on_block(sent, received, FEC_PAYLOAD)
+        seq = (seq + 1) & 0xff
+        blocks += 1
+        frames += sent
+        data_frames += len(block)
+        block = list()
+
+    print("FEC: " + str(blocks) + " blocks, " + str(data_frames) + " data frames, "
+          + str(frames - data_frames) + " parity and repair frames, loss estimate %.3f" % stats.loss())
+
+    return seq
+
+
+def receive_fec_stream(radio):
+    """ Generator that receives the blocks of send_fec_stream() and yields
+    their data in order. Every FRAME_FEC_END is answered with an ACK that
+    carries the frames received and the frames still needed to rebuild
+    the block (0 once it is rebuilt). The generator ends when the sender
+    closes the stream with FRAME_FIN, or after RECEIVE_IDLE seconds
+    without hearing from it. """
+
+    expected = 0
+    frames = dict()
+    last_ack = None
+    linger = None
+    heard = False
+    while True:
+        radio.startListening()
+        if not wait_for_data(radio, linger if linger is not None else (RECEIVE_IDLE if heard else None)):
+            radio.stopListening()
+            if linger is None:
+                print("Nothing from the sender in " + str(RECEIVE_IDLE) + " seconds, it is gone")
+            break
+        heard = True
+        frame = parse_frame(read_packet(radio))
+        radio.stopListening()
+
+        if frame is None:
+            # Lost like any other frame, the parity takes care of it
+            continue
+
+        frame_type, seq, data = frame
+        if frame_type == FRAME_FIN:
+            send_packet(radio, build_frame(FRAME_FIN_ACK, seq))
+            linger = fin_linger(data)
+        elif linger is not None:
+            continue
+        elif frame_type == FRAME_FEC and seq == expected:
+            frames.setdefault(data[0] & ~FEC_LAST, data[2:])
+        elif frame_type == FRAME_FEC_END and seq == expected:
+            k, last = data[0], data[1]
+            decoded = lib_fec.decode(frames, k, FEC_PAYLOAD)
+            if decoded is None:
+                send_packet(radio, build_frame(FRAME_ACK, seq, bytes([len(frames), k - len(frames)])))
+                continue
+
+            last_ack = build_frame(FRAME_ACK, seq, bytes([len(frames), 0]))
+            send_packet(radio, last_ack)
+            expected = (expected + 1) & 0xff
+            frames = dict()
+
+            data = b''.join(decoded)
+            if last:
+                data = data[:-data[-1] - 1]
+            yield data
+        elif frame_type == FRAME_FEC_END and seq == (expected - 1) & 0xff and last_ack:
+            # Our ACK got lost, the sender is asking again
+            send_packet(radio, last_ack)
+
+
+def missing_bytes(missing):
+    """ Packs a set of block indexes into the bitmap of a FRAME_REPORT. """
+
+    bitmap = 0
+    for index in missing:
+        bitmap |= 1 << index
+
+    return bitmap.to_bytes((MULTICAST_WINDOW + 7) // 8, 'big')
+
+
+def missing_from_bytes(data, count):
+    """ Unpacks a FRAME_REPORT bitmap into the set of missing blocks. """
+
+    bitmap = int.from_bytes(bytes(data), 'big')
+    return set(index for index in range(count) if bitmap >> index & 1)
+
+
+def poll_node(radio, window, node, count, last):
+    """ Asks one receiver for the blocks of the window it is missing.
+    It returns their set (empty when the receiver has them all), or None
+    if the receiver did not answer MULTICAST_POLL_ATTEMPTS polls. """
+
+    frame = build_frame(FRAME_POLL, window, bytes([node, count, last]))
+    for attempt in range(MULTICAST_POLL_ATTEMPTS):
+        reply, nak = try_send(radio, frame, window, FRAME_REPORT)
+        if reply and reply[0] == node:
+            return missing_from_bytes(reply[1:], count)
+
+    return None
+
+
+def send_multicast(radio, blocks, nodes):
+    """ Sends the blocks once to every receiver listening on the shared
+    address, MULTICAST_WINDOW blocks at a time and without ACKs. After
+    each window the receivers are polled one by one for the blocks they
+    missed and the union of those is sent again, until every receiver has
+    the whole window. Receivers that stop answering are dropped.
+
+    It returns (nodes that got everything, data frames sent). """
+
+    nodes = list(nodes)
+    sent = 0
+    for start in range(0, len(blocks), MULTICAST_WINDOW):
+        window = start // MULTICAST_WINDOW & 0xff
+        count = min(MULTICAST_WINDOW, len(blocks) - start)
+        last = start + count == len(blocks)
+        missing = set(range(count))
+        pending = list(nodes)
+        while pending and missing:
+            for index in sorted(missing):
+                send_packet(radio, build_frame(FRAME_MDATA, window, bytes([index]) + blocks[start + index]))
+            sent += len(missing)
+
+            missing = set()
+            for node in list(pending):
+                report = poll_node(radio, window, node, count, last)
+                if report is None:
+                    print("Node " + str(node) + " does not answer, dropped")
+                    pending.remove(node)
+                    nodes.remove(node)
+                elif report:
+                    missing |= report
+                else:
+                    pending.remove(node)
+
+    for i in range(MULTICAST_FIN_REPEAT):
+        send_packet(radio, build_frame(FRAME_FIN, 0))
+
+    return nodes, sent
+
+
+def receive_multicast(radio, node):
+    """ Generator that receives the blocks sent by send_multicast() and
+    yields them in order, a whole window at a time. Only polls for this
+    node are answered. It ends with the FIN of the sender, after
+    MULTICAST_LINGER seconds of silence once everything has arrived, or
+    when the sender moves on without us (we were dropped). """
+
+    window = 0
+    blocks = dict()
+    finished = False
+    while True:
+        radio.startListening()
+        if not wait_for_data(radio, MULTICAST_LINGER if finished else None):
+            radio.stopListening()
+            return
+        frame = parse_frame(read_packet(radio))
+        radio.stopListening()
+
+        if frame is None:
+            continue
+
+        frame_type, seq, data = frame
+        if frame_type == FRAME_FIN:
+            return
+        elif frame_type == FRAME_MDATA and seq == window and not finished:
+            blocks[data[0]] = data[1:]
+        elif frame_type == FRAME_POLL and data[0] == node:
+            count, last = data[1], data[2]
+            if seq == (window - 1) & 0xff or finished:
+                # We already have that window, our last report got lost
+                send_packet(radio, build_frame(FRAME_REPORT, seq, bytes([node]) + missing_bytes(())))
+                continue
+            elif seq != window:
+                print("Dropped by the sender at window " + str(window))
+                return
+
+            missing = set(range(count)) - set(blocks)
+            send_packet(radio, build_frame(FRAME_REPORT, seq, bytes([node]) + missing_bytes(missing)))
+            if not missing:
+                for index in range(count):
+                    yield blocks[index]
+                window = (window + 1) & 0xff
+                blocks = dict()
+                finished = bool(last)
+        elif frame_type in (FRAME_MDATA, FRAME_POLL) and seq == (window + 1) & 0xff and not finished:
+            print("Dropped by the sender at window " + str(window))
+            return
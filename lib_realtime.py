@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Real-time mode for the radio loop of the Quick Mode scripts of Team B
+# The thread that talks to the radio is pinned to one core and, when the
+# system allows it, runs with SCHED_FIFO priority; the memory mapped so far is
+# locked so it never waits for a page, and the garbage collector is frozen
+# so it does not stop the loop while frames fill the 3 slot RX FIFO.
+# Run this file to compare the scheduling latency with and without it.
+# Date: 19/10/2026
+# Version: 1.0
+
+import os
+import sys
+import gc
+import time
+import array
+import ctypes
+import threading
+
+# Priority of the radio thread; the latency monitor runs one above it
+RT_PRIORITY = 50
+# Period of the latency monitor, in seconds, and samples it keeps (the last ones)
+RT_SAMPLE_INTERVAL = 0.001
+RT_SAMPLES = 300000
+
+# Only what is mapped already: with MCL_FUTURE every file mapped later (the one
+# being sent) would be read and locked whole, and fail when it outgrows the RAM
+_MCL_CURRENT = 1
+
+
+def default_cpu():
+    """ The last core, the one the kernel keeps least busy on a Pi (and
+    the one to leave out of the scheduler with isolcpus=). """
+
+    return max(os.sched_getaffinity(0))
+
+
+class RealTime:
+    """ Puts the calling thread in real-time mode with enter() and back
+    with leave(); it also works as a with block. Each step is tried on
+    its own and the ones the system refuses (SCHED_FIFO and mlockall
+    usually need root or CAP_SYS_NICE / CAP_IPC_LOCK) are listed in
+    refused instead of stopping the transfer. """
+
+    def __init__(self, cpu=None, priority=RT_PRIORITY):
+        self.cpu = default_cpu() if cpu is None else cpu
+        self.priority = priority
+        self.granted = list()
+        self.refused = list()
+        self.affinity = None
+        self.policy = None
+        self.gc_enabled = gc.isenabled()
+
+    def enter(self):
+        self.granted = list()
+        self.refused = list()
+
+        try:
+            self.affinity = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, {self.cpu})
+            self.granted.append("CPU " + str(self.cpu))
+        except OSError as e:
+            self.affinity = None
+            self.refused.append("CPU " + str(self.cpu) + " (" + e.strerror + ")")
+
+        try:
+            self.policy = (os.sched_getscheduler(0), os.sched_getparam(0))
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            self.granted.append("SCHED_FIFO " + str(self.priority))
+        except OSError as e:
+            self.policy = None
+            self.refused.append("SCHED_FIFO (" + e.strerror + ")")
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.mlockall(_MCL_CURRENT) == 0:
+            self.granted.append("mlockall")
+        else:
+            self.refused.append("mlockall (" + os.strerror(ctypes.get_errno()) + ")")
+
+        # Collect now, then keep every object alive so far out of the collections
+        self.gc_enabled = gc.isenabled()
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        gc.disable()
+        self.granted.append("GC off")
+
+        return self
+
+    def leave(self):
+        if self.gc_enabled:
+            gc.enable()
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+
+        if "mlockall" in self.granted:
+            ctypes.CDLL(None).munlockall()
+        if self.policy is not None:
+            os.sched_setscheduler(0, self.policy[0], self.policy[1])
+        if self.affinity is not None:
+            os.sched_setaffinity(0, self.affinity)
+
+    def __enter__(self):
+        return self.enter()
+
+    def __exit__(self, *exc):
+        self.leave()
+
+    def summary(self):
+        text = "Real-time mode: " + (", ".join(self.granted) or "nothing")
+        if self.refused:
+            text += "; refused: " + ", ".join(self.refused)
+        return text
+
+
+class LatencyMonitor:
+    """ Measures the scheduling latency the radio loop sees, the way
+    cyclictest does: a thread on the same core, one priority above it,
+    sleeps for interval seconds again and again and records how late
+    it wakes up. Started before RealTime.enter() it runs as a normal
+    thread, to have something to compare with. """
+
+    def __init__(self, cpu=None, priority=None, interval=RT_SAMPLE_INTERVAL):
+        self.cpu = cpu
+        self.priority = priority
+        self.interval = interval
+        # Allocated once, the thread only stores into it
+        self.samples = array.array('q', bytes(8 * RT_SAMPLES))
+        self.count = 0
+        self.running = False
+        self.thread = None
+
+    def _run(self):
+        if self.cpu is not None:
+            os.sched_setaffinity(0, {self.cpu})
+        if self.priority is not None:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            except OSError:
+                pass
+
+        interval_ns = int(self.interval * 1000000000)
+        wake_at = time.perf_counter_ns() + interval_ns
+        while self.running:
+            time.sleep(max(wake_at - time.perf_counter_ns(), 0) / 1000000000.0)
+            now = time.perf_counter_ns()
+            self.samples[self.count % RT_SAMPLES] = now - wake_at
+            self.count += 1
+            wake_at = now + interval_ns
+
+    def start(self, realtime=None):
+        """ Starts sampling; with the RealTime of the radio loop the thread
+        runs on its core, at its priority plus one. """
+
+        if realtime is not None:
+            self.cpu = realtime.cpu
+            if any(step.startswith("SCHED_FIFO") for step in realtime.granted):
+                self.priority = realtime.priority + 1
+        self.count = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def percentiles(self, points=(0.5, 0.99, 1.0)):
+        """ Returns the given percentiles of the latency, in us. """
+
+        samples = sorted(self.samples[:min(self.count, RT_SAMPLES)])
+        if not samples:
+            return [0.0 for point in points]
+        return [samples[min(int(len(samples) * point), len(samples) - 1)] / 1000.0 for point in points]
+
+    def summary(self):
+        median, p99, worst = self.percentiles()
+        return ("Scheduling latency: %d samples, median %.0f us, p99 %.0f us, max %.0f us"
+                % (self.count, median, p99, worst))
+
+
+def measure(seconds, realtime=None):
+    """ Runs a LatencyMonitor for seconds while the calling thread is
+    busy polling, like the radio loop, and returns it. """
+
+    monitor = LatencyMonitor()
+    monitor.start(realtime)
+    finish = time.time() + seconds
+    while time.time() < finish:
+        time.sleep(0.001)
+    monitor.stop()
+
+    return monitor
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("Normal scheduling")
+    print(measure(seconds).summary())
+
+    with RealTime() as realtime:
+        print(realtime.summary())
+        print(measure(seconds, realtime).summary())
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Multi-hop relaying for the Quick Mode scripts of Team B
+# Every data frame of a routed stream starts with the destination node and a
+# hop limit. A relay with two radios receives on one channel and forwards on
+# another at the same time, frame by frame as they arrive (cut-through), with
+# STOP&WAIT on each hop, so a two hop transfer runs about as fast as one hop.
+# Date: 19/10/2026
+# Version: 1.0
+
+import sys
+import time
+import queue
+import struct
+import threading
+import lib_quickmode
+import lib_linkstats
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_relay")
+    print("")
+
+    exit()
+
+
+# [destination node][hops left] at the start of the data of every frame
+ROUTE_HEADER = struct.Struct('>BB')
+ROUTE_DATA_SIZE = lib_quickmode.DATA_SIZE - ROUTE_HEADER.size
+ROUTE_TTL = 8
+# Frames a relay holds between its two hops; a full queue holds back the
+# ACKs upstream, so the sender slows down to the pace of the next hop
+RELAY_QUEUE = 64
+# A next hop that acknowledges nothing for RELAY_DEAD_TIME seconds per hop
+# left after it (plus one) is given up for the rest of the stream. A relay
+# with a full queue does not listen while its own next hop is tried, so the
+# relays closer to the sender wait longer than the ones behind them.
+RELAY_DEAD_TIME = 2
+# Seconds a FIN is repeated towards a relay, longer than it can be busy
+RELAY_FIN_WAIT = RELAY_DEAD_TIME * (ROUTE_TTL + 1)
+
+
+def route_chunks(chunks, destination, ttl=ROUTE_TTL):
+    """ Prefixes every chunk (of up to ROUTE_DATA_SIZE bytes) with the
+    route header towards destination. """
+
+    header = ROUTE_HEADER.pack(destination, ttl)
+    for chunk in chunks:
+        yield header + bytes(chunk)
+
+
+def routed_data(stream, node):
+    """ Takes the routed frames of a received stream and yields the data
+    of the ones addressed to node, without their route header. """
+
+    for data in stream:
+        destination, ttl = ROUTE_HEADER.unpack_from(data, 0)
+        if destination == node:
+            yield data[ROUTE_HEADER.size:]
+
+
+def finish_route(radio, seq, stats=None):
+    """ Closes a routed stream like finish_stream(), but keeps repeating
+    the FIN for up to RELAY_FIN_WAIT seconds, since a relay with a full
+    queue cannot answer it yet. It returns True if the FIN_ACK arrived. """
+
+    deadline = time.time() + RELAY_FIN_WAIT
+    while time.time() < deadline:
+        if lib_quickmode.finish_stream(radio, seq, stats):
+            return True
+
+    return False
+
+
+class Relay:
+    """ Forwards a routed stream from the upstream radio to the next hop
+    of every frame through the downstream radio. routes maps each
+    destination node to the channel its next hop listens on (None for
+    the default route). The upstream side acknowledges a frame as soon
+    as it is queued and a second thread sends the queue downstream, each
+    next hop with its own sequence numbers and LinkStats. A next hop that
+    stops answering (see RELAY_DEAD_TIME) is dead: the rest of its
+    frames are dropped, so it does not hold up the other destinations. """
+
+    def __init__(self, upstream, downstream, routes, size=RELAY_QUEUE):
+        self.upstream = upstream
+        self.downstream = downstream
+        self.routes = routes
+        self.queue = queue.Queue(size)
+        self.seq = dict()
+        self.stats = dict()
+        self.dead = set()
+        self.forwarded = 0
+        self.dropped = 0
+
+    def _next_hop(self, destination):
+        return self.routes.get(destination, self.routes.get(None))
+
+    def _send(self, hop, data):
+        """ Sends one frame to the next hop with STOP&WAIT, until it is
+        acknowledged or the next hop looks dead. It returns True if the
+        next hop acknowledged it. """
+
+        frame = lib_quickmode.build_frame(lib_quickmode.FRAME_DATA, self.seq[hop], data)
+        stats = self.stats[hop]
+        deadline = time.time() + RELAY_DEAD_TIME * (data[1] + 1)
+        while time.time() < deadline:
+            started = time.time()
+            reply, nak = lib_quickmode.try_send(self.downstream, frame, self.seq[hop], timeout=stats.timeout())
+            stats.on_attempt(reply is not None, nak, len(data), time.time() - started)
+            if reply is not None:
+                return True
+
+        return False
+
+    def _forward(self):
+        channel = None
+        while True:
+            data = self.queue.get()
+            if data is None:
+                break
+
+            hop = self._next_hop(data[0])
+            if hop is None or data[1] == 0 or hop in self.dead:
+                self.dropped += 1
+                continue
+            if hop != channel:
+                self.downstream.setChannel(hop)
+                channel = hop
+            if hop not in self.seq:
+                self.seq[hop] = 0
+                self.stats[hop] = lib_linkstats.LinkStats(self.downstream)
+
+            data = ROUTE_HEADER.pack(data[0], data[1] - 1) + data[ROUTE_HEADER.size:]
+            if self._send(hop, data):
+                self.seq[hop] = (self.seq[hop] + 1) & 0xff
+                self.forwarded += 1
+            else:
+                self.dead.add(hop)
+                self.dropped += 1
+
+        # The stream is over upstream, close it on every hop still alive
+        for hop in self.seq:
+            if hop in self.dead:
+                continue
+            self.downstream.setChannel(hop)
+            finish_route(self.downstream, self.seq[hop], self.stats[hop])
+
+    def run(self):
+        """ Relays one stream, until the sender closes it and every frame
+        has been forwarded and the next hops closed too. """
+
+        forwarder = threading.Thread(target=self._forward)
+        forwarder.start()
+        for data in lib_quickmode.receive_stream(self.upstream):
+            self.queue.put(data)
+        self.queue.put(None)
+        forwarder.join()
@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# SPI transaction tracing for lib_nrf24 (Quick Mode, Team B)
+# Every spidev.xfer2() of the driver is timestamped into a fixed size binary
+# ring, together with markers around the logical radio operations, so a run
+# on the hardware rig can be analysed later with qm-trace-replay.py.
+# Date: 19/10/2026
+# Version: 1.0
+
+import sys
+import time
+import struct
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_spitrace")
+    print("")
+
+    exit()
+
+
+# [magic][version][role][records]; the role tells which side delivers the payload
+TRACE_MAGIC = b'QMTR'
+TRACE_HEADER = struct.Struct('<4sBBI')
+TRACE_VERSION = 2
+
+ROLE_SENDER = 0
+ROLE_RECEIVER = 1
+ROLES = ['sender', 'receiver']
+
+# start (ns), duration (ns), opcode or operation, register, length, kind
+RECORD = struct.Struct('<QIBBHB')
+
+KIND_XFER = 0
+KIND_OP_BEGIN = 1
+KIND_OP_END = 2
+
+# Logical operations marked in the trace, the index is stored in the record
+OPERATIONS = ['write', 'available', 'read', 'startListening', 'stopListening']
+
+
+class TracingSpiDev:
+    """ Wraps a spidev object and records every xfer2() into a ring of
+    size records, traced on the side of the transfer given by role.
+    Everything else is passed to the wrapped object. """
+
+    def __init__(self, spi, size=65536, role=ROLE_SENDER):
+        self.__dict__['spi'] = spi
+        self.__dict__['role'] = role
+        self.__dict__['ring'] = bytearray(RECORD.size * size)
+        self.__dict__['size'] = size
+        self.__dict__['count'] = 0
+
+    def __getattr__(self, name):
+        return getattr(self.spi, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.spi, name, value)
+
+    def record(self, start, duration, opcode, reg, length, kind):
+        """ Stores one record, overwriting the oldest when the ring is full. """
+
+        offset = (self.count % self.size) * RECORD.size
+        RECORD.pack_into(self.ring, offset, start, min(duration, 0xffffffff), opcode, reg, min(length, 0xffff), kind)
+        self.__dict__['count'] = self.count + 1
+
+    def xfer2(self, buf):
+        start = time.perf_counter_ns()
+        resp = self.spi.xfer2(buf)
+        duration = time.perf_counter_ns() - start
+
+        opcode = buf[0]
+        # Only R_REGISTER and W_REGISTER carry a register number
+        reg = opcode & 0x1f if opcode < 0x40 else 0
+        self.record(start, duration, opcode, reg, len(buf), KIND_XFER)
+        return resp
+
+    def records(self):
+        """ Returns the raw records still in the ring, oldest first. """
+
+        if self.count <= self.size:
+            return bytes(self.ring[:self.count * RECORD.size])
+
+        split = (self.count % self.size) * RECORD.size
+        return bytes(self.ring[split:] + self.ring[:split])
+
+    def save(self, file_path):
+        """ Writes the trace to file_path. """
+
+        records = self.records()
+        with open(file_path, 'wb') as f:
+            f.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.role, len(records) // RECORD.size))
+            f.write(records)
+
+
+def _traced(tracer, op, method):
+    """ Wraps a radio method so its calls are marked in the trace.
+    The end marker carries the number of payload bytes moved. """
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        tracer.record(start, 0, op, 0, 0, KIND_OP_BEGIN)
+        result = method(*args, **kwargs)
+        end = time.perf_counter_ns()
+
+        length = 0
+        if OPERATIONS[op] == 'write' and result:
+            length = len(args[0])
+        elif OPERATIONS[op] == 'read':
+            length = len(args[0])
+        tracer.record(end, end - start, op, 0, length, KIND_OP_END)
+        return result
+
+    return wrapper
+
+
+def enable_tracing(radio, role, size=65536):
+    """ Starts tracing the SPI traffic of an NRF24 radio of the given
+    role (ROLE_SENDER or ROLE_RECEIVER) and marks its logical operations.
+    It returns the TracingSpiDev, whose save() writes the trace. """
+
+    tracer = TracingSpiDev(radio.spidev, size, role)
+    radio.spidev = tracer
+    for op, name in enumerate(OPERATIONS):
+        setattr(radio, name, _traced(tracer, op, getattr(radio, name)))
+
+    return tracer
+
+
+def load_trace(file_path):
+    """ Reads a trace written by TracingSpiDev.save() and returns its
+    role and the list of records as (start, duration, opcode, reg,
+    length, kind). """
+
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    magic, version, role, count = TRACE_HEADER.unpack_from(data, 0)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise Exception("Not a SPI trace: " + file_path)
+
+    return role, [RECORD.unpack_from(data, TRACE_HEADER.size + i * RECORD.size) for i in range(count)]
+
+
+class FakeSpiDev:
+    """ Minimal stand-in for spidev used when replaying traces: it answers
+    every transfer with an idle STATUS byte followed by zeroes. """
+
+    def __init__(self):
+        self.max_speed_hz = 0
+        self.transfers = 0
+
+    def open(self, bus, device):
+        pass
+
+    def close(self):
+        pass
+
+    def xfer2(self, buf):
+        self.transfers += 1
+        return [0x0e] + [0] * (len(buf) - 1)
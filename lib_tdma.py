@@ -0,0 +1,247 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# TDMA for many senders sharing one gateway for the Quick Mode scripts of Team B
+# The gateway starts every superframe with a FRAME_BEACON listing the senders
+# in slot order. The slot after the beacon is open for FRAME_JOIN requests;
+# then each sender gets one slot to itself, where it sends with STOP&WAIT.
+# Nobody else transmits in it, so frames do not collide. The end of every
+# slot is kept free as a guard, sized from the delay and jitter the gateway
+# measures on the senders.
+# Date: 19/10/2026
+# Version: 1.0
+
+import sys
+import time
+import random
+import struct
+import lib_quickmode
+from lib_quickmode import build_frame, parse_frame, read_packet, send_packet, try_send, wait_for_data
+
+if __name__ == '__main__':
+    print(sys.argv[0], 'is an importable module:')
+    print("...  from", sys.argv[0], "import lib_tdma")
+    print("")
+
+    exit()
+
+
+# A FRAME_BEACON is [slot length in us][guard in us][node of slot 0][node of slot 1]...
+# and a FRAME_JOIN is [node][next seq of the sender], so a sender dropped halfway resumes
+TDMA_BEACON = struct.Struct('>HH')
+TDMA_MAX_NODES = lib_quickmode.DATA_SIZE - TDMA_BEACON.size
+# Data frames carry the node first, so the gateway knows whose they are
+TDMA_DATA_SIZE = lib_quickmode.DATA_SIZE - 1
+
+# Seconds per slot; the superframe is the join slot plus one slot per sender
+TDMA_SLOT = 0.05
+# The guard is the mean delay senders start their slot with (they time it from
+# the beacon as they read it) plus TDMA_GUARD_FACTOR times its deviation, never
+# below TDMA_MIN_GUARD (air time and polling)
+TDMA_MIN_GUARD = 0.002
+TDMA_GUARD_FACTOR = 4
+TDMA_ALPHA = 0.125
+# Seconds one exchange is assumed to take until the LinkStats measures it
+TDMA_EXCHANGE = 0.005
+# Chance a sender not in the beacon asks to join in this superframe
+TDMA_JOIN_PROBABILITY = 0.5
+# Superframes without a frame from a sender before its slot is taken back
+TDMA_IDLE = 20
+# Seconds a sender waits for a beacon before giving up
+TDMA_BEACON_TIMEOUT = 10
+
+
+def wait_beacon(radio, timeout=TDMA_BEACON_TIMEOUT):
+    """ Listens until the next FRAME_BEACON. It returns (time it arrived,
+    slot, guard, nodes in slot order), or None after timeout seconds. """
+
+    radio.startListening()
+    deadline = time.time() + timeout
+    while wait_for_data(radio, deadline - time.time()):
+        received_at = time.time()
+        frame = parse_frame(read_packet(radio))
+        if frame is not None and frame[0] == lib_quickmode.FRAME_BEACON and len(frame[2]) >= TDMA_BEACON.size:
+            radio.stopListening()
+            slot, guard = TDMA_BEACON.unpack_from(frame[2], 0)
+            return received_at, slot / 1000000.0, guard / 1000000.0, list(frame[2][TDMA_BEACON.size:])
+    radio.stopListening()
+
+    return None
+
+
+def send_tdma_stream(radio, chunks, node, stats=None):
+    """ Sends every chunk (of up to TDMA_DATA_SIZE bytes) to the gateway,
+    only inside the slot of node. Until the beacon lists the node, it asks
+    for a slot with a FRAME_JOIN at a random time of the join slot; after
+    losing its slot it joins again and goes on from the frame it was
+    sending. In the slot, frames go with STOP&WAIT while an exchange still fits before the
+    guard. The stream ends with a FRAME_FIN; a beacon without the node
+    after it means the gateway got it. It returns True if the transfer
+    finished, False if the beacons stopped. """
+
+    chunks = iter(chunks)
+    seq = 0
+    chunk = next(chunks, None)
+    frame = None
+    fin_sent = False
+    while True:
+        beacon = wait_beacon(radio)
+        if beacon is None:
+            return False
+        received_at, slot, guard, nodes = beacon
+        exchange = stats.rtt if stats and stats.rtt else TDMA_EXCHANGE
+
+        if node not in nodes:
+            if fin_sent:
+                return True
+            if random.random() < TDMA_JOIN_PROBABILITY:
+                time.sleep(random.uniform(0, max(slot - guard - exchange, 0)))
+                send_packet(radio, build_frame(lib_quickmode.FRAME_JOIN, 0, bytes([node, seq])))
+            continue
+
+        start = received_at + (1 + nodes.index(node)) * slot
+        end = start + slot - guard
+        time.sleep(max(start - time.time(), 0))
+        while True:
+            remaining = end - time.time()
+            if remaining < exchange:
+                break
+
+            if frame is None and chunk is not None:
+                frame = build_frame(lib_quickmode.FRAME_DATA, seq, bytes([node]) + bytes(chunk))
+            elif frame is None:
+                frame = build_frame(lib_quickmode.FRAME_FIN, seq, bytes([node]))
+                fin_sent = True
+            answer = lib_quickmode.FRAME_FIN_ACK if frame[0] == lib_quickmode.FRAME_FIN else lib_quickmode.FRAME_ACK
+
+            timeout = stats.timeout() if stats else lib_quickmode.ACK_TIMEOUT
+            started = time.time()
+            reply, nak = try_send(radio, frame, seq, answer, min(timeout, remaining))
+            # An answer cut short by the end of the slot says nothing of the link
+            if stats and (reply is not None or timeout <= remaining):
+                stats.on_attempt(reply is not None, nak, len(frame) - lib_quickmode.HEADER_SIZE
+                                 - lib_quickmode.CRC_SIZE - 1, time.time() - started)
+            if reply is None:
+                continue
+            if answer == lib_quickmode.FRAME_FIN_ACK:
+                return True
+
+            seq = (seq + 1) & 0xff
+            chunk = next(chunks, None)
+            frame = None
+            exchange = stats.rtt if stats and stats.rtt else TDMA_EXCHANGE
+
+
+class Gateway:
+    """ The receiving side of TDMA: it sends the beacons, hands out the
+    slots and acknowledges the frames of each sender in its slot. The
+    guard follows the time senders start transmitting in their slots,
+    averaged like the round trip time of RFC 6298; frames that arrive
+    outside the slot of their sender are counted as out_of_slot. The next
+    seq of every sender that lost its slot is kept in lost, and its stream
+    goes on from there when it joins again. """
+
+    def __init__(self, radio, slot=TDMA_SLOT, max_nodes=TDMA_MAX_NODES):
+        self.radio = radio
+        self.slot = slot
+        self.max_nodes = max_nodes
+        self.nodes = list()
+        self.slots = list()
+        self.expected = dict()
+        self.idle = dict()
+        self.lost = dict()
+        self.offset = None
+        self.offset_var = 0.0
+        self.guard = TDMA_MIN_GUARD
+        self.superframes = 0
+        self.out_of_slot = 0
+
+    def _on_offset(self, offset):
+        if self.offset is None:
+            self.offset = offset
+        else:
+            self.offset_var += TDMA_ALPHA * (abs(self.offset - offset) - self.offset_var)
+            self.offset += TDMA_ALPHA * (offset - self.offset)
+        self.guard = min(max(TDMA_MIN_GUARD, max(self.offset, 0) + TDMA_GUARD_FACTOR * self.offset_var), self.slot / 4)
+
+    def _reply(self, frame):
+        self.radio.stopListening()
+        send_packet(self.radio, frame)
+        self.radio.startListening()
+
+    def _listen(self, until):
+        """ Generator over the good frames that arrive before until, with
+        the time each one arrived. """
+
+        while wait_for_data(self.radio, until - time.time()):
+            received_at = time.time()
+            frame = parse_frame(read_packet(self.radio))
+            if frame is not None:
+                yield received_at, frame
+
+    def _drop(self, node):
+        self.nodes.remove(node)
+        del self.expected[node]
+        del self.idle[node]
+
+    def beacon(self):
+        """ Sends the beacon of a new superframe and returns when it went out. """
+
+        self.slots = list(self.nodes)
+        data = TDMA_BEACON.pack(int(self.slot * 1000000), int(self.guard * 1000000)) + bytes(self.slots)
+        self.radio.stopListening()
+        send_packet(self.radio, build_frame(lib_quickmode.FRAME_BEACON, self.superframes, data))
+        self.radio.startListening()
+        self.superframes += 1
+
+        return time.time()
+
+    def receive(self):
+        """ Generator that runs the superframes for ever and yields
+        (node, data) for every new frame of a sender, in order, and
+        (node, None) when a sender finishes or loses its slot (it is
+        in lost then). """
+
+        while True:
+            sent_at = self.beacon()
+            for received_at, (frame_type, seq, data) in self._listen(sent_at + self.slot):
+                if frame_type != lib_quickmode.FRAME_JOIN or not data:
+                    self.out_of_slot += 1
+                elif data[0] not in self.nodes and len(self.nodes) < self.max_nodes:
+                    self.nodes.append(data[0])
+                    seq = data[1] if len(data) > 1 else 0
+                    # The sender may resend the frame whose ACK was lost, our own count wins then
+                    lost = self.lost.pop(data[0], None)
+                    self.expected[data[0]] = lost if lost is not None and seq in (lost, (lost - 1) & 0xff) else seq
+                    self.idle[data[0]] = 0
+
+            # The slots follow the beacon just sent, not the list changed by the joins
+            for index, node in enumerate(self.slots):
+                start = sent_at + (1 + index) * self.slot
+                heard = False
+                for received_at, (frame_type, seq, data) in self._listen(start + self.slot):
+                    if not data or data[0] != node or node not in self.expected:
+                        self.out_of_slot += 1
+                        continue
+                    if not heard:
+                        self._on_offset(received_at - start)
+                        heard = True
+
+                    expected = self.expected[node]
+                    if frame_type == lib_quickmode.FRAME_DATA:
+                        if seq in (expected, (expected - 1) & 0xff):
+                            self._reply(build_frame(lib_quickmode.FRAME_ACK, seq, bytes([node])))
+                        if seq == expected:
+                            self.expected[node] = (expected + 1) & 0xff
+                            yield node, data[1:]
+                    elif frame_type == lib_quickmode.FRAME_FIN and seq == expected:
+                        self._reply(build_frame(lib_quickmode.FRAME_FIN_ACK, seq, bytes([node])))
+                        self._drop(node)
+                        yield node, None
+
+                if node in self.idle:
+                    self.idle[node] = 0 if heard else self.idle[node] + 1
+                    if self.idle[node] > TDMA_IDLE:
+                        self.lost[node] = self.expected[node]
+                        self._drop(node)
+                        yield node, None
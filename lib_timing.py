@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Microsecond delays for lib_nrf24 (Quick Mode, Team B)
+# On Linux time.sleep() of a few microseconds really lasts 60-100us or more,
+# so the CE pulses and settle delays of the radio were dominated by oversleeping.
+# delay_us() sleeps only for the part of the wait that is longer than the
+# measured sleep overshoot of this host and spins on perf_counter_ns() for
+# the rest.
+# Run this file to see the calibration and to check the CE pulse widths.
+# Date: 19/10/2026
+# Version: 1.0
+
+import sys
+import time
+
+# Sleep overshoot of this host in ns, measured by calibrate() on the first
+# delay_us(), so importing the driver costs nothing
+_sleep_overhead_ns = None
+
+
+def calibrate(samples=200):
+    """ Measures how much longer than requested a minimal time.sleep()
+    lasts on this host. The 90th percentile is kept as the sleep overhead,
+    so delay_us() almost never wakes up too late. It returns the
+    (median, 90th percentile, max) overshoot in ns. """
+
+    global _sleep_overhead_ns
+
+    overshoot = list()
+    for i in range(samples):
+        start = time.perf_counter_ns()
+        time.sleep(1 / 1000000.0)
+        overshoot.append(time.perf_counter_ns() - start - 1000)
+
+    overshoot.sort()
+    _sleep_overhead_ns = overshoot[samples * 9 // 10]
+    return overshoot[samples // 2], _sleep_overhead_ns, overshoot[-1]
+
+
+def delay_us(us):
+    """ Waits us microseconds: sleeping while the remaining time is
+    longer than the sleep overhead, spinning for the rest. """
+
+    if _sleep_overhead_ns is None:
+        calibrate()
+
+    deadline = time.perf_counter_ns() + int(us * 1000)
+    remaining = deadline - time.perf_counter_ns()
+    if remaining > _sleep_overhead_ns:
+        time.sleep((remaining - _sleep_overhead_ns) / 1000000000.0)
+
+    while time.perf_counter_ns() < deadline:
+        pass
+
+
+class PulseRecorder:
+    """ Fake GPIO module that records the time of every output() call,
+    to measure the pulses the radio driver generates without hardware. """
+
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    BCM = 11
+    RPI_REVISION = 3
+
+    def __init__(self):
+        self.events = list()
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, mode):
+        pass
+
+    def output(self, pin, level):
+        self.events.append((time.perf_counter_ns(), pin, level))
+
+    def pulse_widths(self, pin):
+        """ Returns the width in us of every HIGH pulse seen on pin. """
+
+        widths = list()
+        rose_at = None
+        for when, event_pin, level in self.events:
+            if event_pin != pin:
+                continue
+            if level == self.HIGH:
+                rose_at = when
+            elif rose_at is not None:
+                widths.append((when - rose_at) / 1000.0)
+                rose_at = None
+
+        return widths
+
+
+def check_pulse_widths(pulses=200, ce_pin=25):
+    """ Generates CE pulses through NRF24.startWrite() against a
+    PulseRecorder and a fake SPI device. The datasheet asks for at least
+    10us; it returns the (min, median, max) width in us. """
+
+    from lib_nrf24 import NRF24
+    import lib_spitrace
+
+    gpio = PulseRecorder()
+    radio = NRF24(gpio, lib_spitrace.FakeSpiDev())
+    radio.ce_pin = ce_pin
+    for i in range(pulses):
+        radio.startWrite(b'\x00' * 32)
+
+    widths = sorted(gpio.pulse_widths(ce_pin))
+    return widths[0], widths[len(widths) // 2], widths[-1]
+
+
+if __name__ == '__main__':
+    median, p90, worst = calibrate()
+    print("time.sleep() overshoot: median %.1f us, p90 %.1f us, max %.1f us" % (median / 1000.0, p90 / 1000.0, worst / 1000.0))
+
+    for us in (10, 130, 150, 1500):
+        start = time.perf_counter_ns()
+        delay_us(us)
+        print("delay_us(%d) took %.1f us" % (us, (time.perf_counter_ns() - start) / 1000.0))
+
+    shortest, median, longest = check_pulse_widths()
+    print("CE pulse: min %.1f us, median %.1f us, max %.1f us" % (shortest, median, longest))
+    if shortest < 10:
+        print("ERROR: CE pulse shorter than 10us")
+        sys.exit(1)
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Receiver part for the Quick Mode competition of Team B
+# This version stays in RX for the whole transfer and loads its answer to
+# every frame into the ACK payload FIFO, so it leaves with the hardware ACK.
+# The files are recreated inside the given folder
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, lib_quickmode.ackpay_profile(channel), spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios and writes every
+    received file under the directory given in the arguments. """
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openReadingPipe(lib_quickmode.ACKPAY_PIPE, pipes[1])
+
+    print("Receiver Information")
+    radio.printDetails()
+
+    writer = lib_quickmode.BatchWriter(sys.argv[1])
+    for data in lib_quickmode.receive_ackpay_stream(radio):
+        writer.feed(data)
+
+    if not writer.done():
+        print("ERROR: the transfer ended before every file arrived")
+    print(str(len(writer.written)) + " files received, " + str(len(writer.failed)) + " with errors")
+
+
+if __name__ == '__main__':
+    main()
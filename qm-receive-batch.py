@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Receiver part for the Quick Mode competition of Team B
+# This version receives several files in one radio session and recreates
+# the directory tree described by the manifest inside the given folder
+# It uses STOP&WAIT with timeout and CRC, like the complete version, and moves
+# the data rate and PA level with the conditions of the link, hopping over
+# the channels the interference leaves free. Telemetry messages from the
+# sender arrive on a control stream multiplexed with the files
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_linkstats
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios and writes every
+    received file under the directory given in the arguments. """
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[0])
+    radio.openReadingPipe(0, pipes[1])
+
+    print("Receiver Information")
+    radio.printDetails()
+
+    writer = lib_quickmode.BatchWriter(sys.argv[1])
+    # Where to wait for the sender if the link is lost after a rate change
+    fallback = lib_quickmode.RATE_LADDER[lib_quickmode.RATE_START]
+    blacklist = lib_quickmode.scan_channels(radio)
+    stats = lib_linkstats.LinkStats(radio)
+    message = b''
+    for stream_id, data, end in lib_quickmode.demux(lib_quickmode.receive_stream(radio, fallback, blacklist, stats)):
+        if stream_id == lib_quickmode.MUX_BULK:
+            writer.feed(data)
+        elif stream_id == lib_quickmode.MUX_CONTROL:
+            message += data
+            if end:
+                print("Sender: " + message.decode('utf-8', 'replace'))
+                message = b''
+
+    if not writer.done():
+        print("ERROR: the transfer ended before every file arrived")
+    print(str(len(writer.written)) + " files received, " + str(len(writer.failed)) + " with errors")
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
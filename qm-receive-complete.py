@@ -2,18 +2,27 @@
 # -*- coding: utf-8 -*-
 #
 # Receiver part for the Quick Mode competition of Team B
-# This version uses STOP&WAIT with timeout if the ACK is not received
+# This version acknowledges once per burst of frames, with the highest frame
+# received in order and a bitmap of the ones after it. Zero runs become
+# holes in the file and repeated blocks are copied from what it already has
 # It also uses CRC to ensure packet integrity
+# The session opens with a SYN carrying the size and MD5 of the file, so the
+# space is reserved (or the file rejected) before the data arrives
+# With --realtime the transfer runs in real-time mode (see lib_realtime.py)
 # Date: 10/04/2019
 # Version: 1.0
 
 import RPi.GPIO as GPIO
 from lib_nrf24 import NRF24
-import time
 import spidev
 import sys
 import os
-import crc16
+import shutil
+import hashlib
+import lib_quickmode
+import lib_dedup
+import lib_spitrace
+import lib_realtime
 
 
 # Initialize GPIOs
@@ -33,145 +42,96 @@ def initialize_radios(csn, ce, channel):
     and the channel that will be used to transmit or receive the data."""
 
     radio = NRF24(GPIO, spidev.SpiDev())
-    radio.begin(csn, ce)
-    time.sleep(2)
-    radio.setRetries(15, 15)
     radio.setPayloadSize(32)
-    radio.setChannel(channel)
-
-    radio.setDataRate(NRF24.BR_250KBPS)
-    radio.setPALevel(NRF24.PA_MIN)
-    radio.setAutoAck(False)
-    radio.enableDynamicPayloads()
-    radio.enableAckPayload()
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
 
     return radio
 
 
-def write_file(file_path, payload_list):
-    """ This function gets the data from the variable payload_list, 
-    iterates through it and saves it to the file you have provided 
-    in the arguments. 
-    
-    Warning: If the size of the payload_list is greater than the size
-    of the RAM memory this script will fail."""
-
-    with open(file_path, "wb") as f:
-        count = 0
-        while count < len(payload_list):
-            f.write(payload_list[count])
-            count = count + 1
-
-
-def send_packet(sender, payload):
-    """ Send the packet through the sender radio. """
-
-    sender.write(payload)
-
-
-def wait_for_data(receiver):
-    """ This is a blocking function that waits
-    until data is available in the receiver pipe. """
-
-    while not receiver.available(pipes[1]):
-        time.sleep(0.01)
+def check_room(file_path):
+    """ Returns the check for accept_session(): the file is rejected
+    before any data is sent if it does not fit in the disk. """
 
+    folder = os.path.dirname(os.path.abspath(file_path))
 
-def ensure_crc(crc):
-    """ In final designs it was found that some text inputs
-    would generate crc lengths smaller than 5 (which is the usual one),
-    so this function ensures we always send 5 bytes through the antenna."""
+    def check(size, digest):
+        if shutil.disk_usage(folder).free < size:
+            return lib_quickmode.SESSION_NO_ROOM
+        return lib_quickmode.SESSION_ACCEPT
 
-    crc = str(crc)
-    if len(crc) == 1:
-        return '0000'+crc
-    elif len(crc) == 2:
-        return '000'+crc
-    elif len(crc) == 3:
-        return '00'+crc
-    elif len(crc) == 4:
-        return '0'+crc
-    elif len(crc) == 5:
-        return crc
-    else:
-        print('There was a problem with the number ensure_crc')
-
-
-def check_crc(chunk, crc):
-    """ This function checks if the received CRC is consistent. """
-
-    crc = bytes(crc)
-    crc_this = bytes(ensure_crc(crc16.crc16xmodem(bytes(chunk))).encode('utf-8'))
-    if crc_this == crc:
-        return True
-    else:
-        return False
+    return check
 
 
 def main():
     """ This main function initializes the radios and receives
     all the data available from the radio. """
 
+    realtime = None
+    if '--realtime' in sys.argv:
+        sys.argv.remove('--realtime')
+        realtime = lib_realtime.RealTime()
+
     radio = initialize_radios(0, 25, 0x60)
 
+    # An optional second argument records the SPI traffic for qm-trace-replay.py
+    tracer = None
+    if len(sys.argv) > 2:
+        tracer = lib_spitrace.enable_tracing(radio, lib_spitrace.ROLE_RECEIVER)
+
     radio.openWritingPipe(pipes[0])
     radio.openReadingPipe(0, pipes[1])
 
     print("Sender Information")
     radio.printDetails()
 
-    payload_list = list()
-
-    out = False
-    count = 0
-    actual_ack = None
-    while not out:
-        radio.startListening()
-        wait_for_data(radio)
-
-        # recv_buffer is the array where received data will be placed
-        recv_buffer = []
-        radio.read(recv_buffer, radio.getDynamicPayloadSize())
-        chunk_and_ack = recv_buffer[:-5]
-        ack_num = recv_buffer[-7:-5]
-        crc = recv_buffer[-5:]
-        data = recv_buffer[:-7]
-        ack_num_str = bytes(ack_num).decode('utf-8'
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            ''
-                                            )
-        data_str = bytes(data)
-
-        radio.stopListening()
-        if (actual_ack != ack_num_str) and (data_str != b'TH1SPR0GRAMSHOULDBEOVER'):
-            if check_crc(chunk_and_ack, crc):
-                send_packet(radio, b'1GUTACK')
-                payload_list.append(bytes(data))
-                actual_ack = ack_num_str
-                print("Sent ACK number " + str(count))
-                count = count + 1
+    if realtime:
+        realtime.enter()
+        print(realtime.summary())
+        monitor = lib_realtime.LatencyMonitor()
+        monitor.start(realtime)
+
+    try:
+        session = lib_quickmode.accept_session(radio, check_room(sys.argv[1]), window=lib_quickmode.SACK_BURST,
+                                               codecs=(lib_quickmode.CODEC_RAW, lib_quickmode.CODEC_DEDUP))
+        print("Receiving a file of " + str(session.size) + " bytes")
+
+        with open(sys.argv[1], "w+b") as f:
+            if session.codec == lib_quickmode.CODEC_DEDUP:
+                writer = lib_dedup.DedupWriter(f)
+                for data in lib_quickmode.receive_sack_stream(radio, session=session):
+                    writer.feed(data)
+                received, digest = writer.finish()
+                print(str(writer.literal) + " bytes received, " + str(writer.repeated) + " repeated, "
+                      + str(writer.zeros) + " zeros")
             else:
-                send_packet(radio, b'1BATACK')
-        elif (actual_ack == ack_num_str) and (data_str != b'TH1SPR0GRAMSHOULDBEOVER'):
-            send_packet(radio, b'1GUTACK')
-        elif (actual_ack != ack_num_str) and data_str == b'TH1SPR0GRAMSHOULDBEOVER':
-            print("Finishing Script")
-            time.sleep(0.5)
-            send_packet(radio, b'TH1SISTH3FINALACK')
-            out = True
-
-    write_file(sys.argv[1], payload_list)
+                # Reserve the space now, the file is written as the frames arrive
+                if session.size and hasattr(os, 'posix_fallocate'):
+                    os.posix_fallocate(f.fileno(), 0, session.size)
+                md5 = hashlib.md5()
+                received = 0
+                for data in lib_quickmode.receive_sack_stream(radio, session=session):
+                    f.write(data)
+                    md5.update(data)
+                    received += len(data)
+                f.truncate(received)
+                digest = md5.digest()
+    finally:
+        if realtime:
+            monitor.stop()
+            realtime.leave()
+            print(monitor.summary())
+
+    if received != session.size or digest != session.digest:
+        print("ERROR: the file received does not match the one announced")
+    else:
+        print("File received successfully")
+
+    if tracer:
+        tracer.save(sys.argv[2])
+        print("SPI trace saved in " + sys.argv[2])
 
 
 if __name__ == '__main__':
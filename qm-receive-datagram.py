@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Receiver part for the Quick Mode competition of Team B
+# Echo side of the datagram latency benchmark: the radio is brought up once
+# and every message received goes straight back, with the same reliability
+# the sender asked for in the arguments
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_datagram
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+# GPIO wired to the IRQ pin of the radio, None to poll the radio instead
+IRQ_PIN = None
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios once and echoes
+    every message until it is stopped. """
+
+    reliable = len(sys.argv) > 1
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[0])
+    radio.openReadingPipe(0, pipes[1])
+
+    link = lib_datagram.DatagramLink(radio, IRQ_PIN)
+    print("Echoing messages")
+    try:
+        while True:
+            link.send_message(link.recv_message(), reliable)
+    except KeyboardInterrupt:
+        link.close()
+
+
+if __name__ == '__main__':
+    main()
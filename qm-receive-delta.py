@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Receiver part for the Quick Mode competition of Team B
+# This version updates a file the receiver already has (rsync-style delta):
+# the receiver first sends the block signatures of its copy, and only the
+# changed bytes plus references to the unchanged blocks are sent back
+# It uses STOP&WAIT with timeout and CRC, like the complete version
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_delta
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios, sends the signature
+    of the file given in the arguments and rebuilds it from the delta. """
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[0])
+    radio.openReadingPipe(0, pipes[1])
+
+    print("Receiver Information")
+    radio.printDetails()
+
+    signature = lib_delta.build_signature(sys.argv[1])
+    block_size = lib_delta.parse_signature(signature)[0]
+    print("Sending signature: " + str(len(signature)) + " bytes")
+    seq = lib_quickmode.send_stream(radio, lib_quickmode.chunked([signature]))
+    lib_quickmode.finish_stream(radio, seq)
+
+    writer = lib_delta.DeltaWriter(sys.argv[1], block_size)
+    for data in lib_quickmode.receive_stream(radio):
+        writer.feed(data)
+
+    if writer.finish():
+        print("File updated: " + str(writer.copied) + " bytes reused, " + str(writer.literal) + " bytes received")
+    else:
+        print("HASH incorrect, the file was not updated")
+
+
+if __name__ == '__main__':
+    main()
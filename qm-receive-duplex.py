@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Receiver part for the Quick Mode competition of Team B
+# This version receives the files of qm-send-duplex.py while it sends files
+# back at the same time: the sender starts and hands the turn over after each
+# burst, and the frames of each side acknowledge those of the other.
+# Arguments: the folder for the files received, then the files or
+# directories to send back (none to only receive)
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_linkstats
+import lib_duplex
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios, sends the files given
+    in the arguments and receives the ones of the other side at once. """
+
+    entries = lib_quickmode.collect_files(sys.argv[2:])
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[0])
+    radio.openReadingPipe(0, pipes[1])
+
+    print("Receiver Information")
+    radio.printDetails()
+
+    print("Sending " + str(len(entries)) + " files while receiving")
+    chunks = lib_quickmode.chunked(lib_quickmode.batch_stream(entries), lib_duplex.DUPLEX_DATA_SIZE)
+    stats = lib_linkstats.LinkStats(radio)
+    duplex = lib_duplex.Duplex(radio, chunks, False, stats=stats)
+    writer = lib_quickmode.BatchWriter(sys.argv[1])
+    for data in duplex.exchange():
+        writer.feed(data)
+
+    if not duplex.complete or not writer.done():
+        print("ERROR: the transfer ended before both sides had everything")
+    print(str(duplex.sent) + " data frames sent in " + str(duplex.turns) + " turns")
+    print(str(len(writer.written)) + " files received, " + str(len(writer.failed)) + " with errors")
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
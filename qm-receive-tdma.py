@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Receiver part for the Quick Mode competition of Team B
+# This version is the gateway of many senders (qm-send-tdma.py) at the same
+# time: its beacons give each sender a slot of its own. The files of every
+# sender are written under a directory named after its node. Arguments: the
+# folder, and optionally how many senders to wait for before stopping
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_tdma
+import spidev
+import sys
+import os
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios and receives the
+    files of every sender until enough of them have finished. """
+
+    senders = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[0])
+    radio.openReadingPipe(0, pipes[1])
+
+    print("Gateway Information")
+    radio.printDetails()
+
+    gateway = lib_tdma.Gateway(radio)
+    writers = dict()
+    lost = dict()
+    finished = 0
+    for node, data in gateway.receive():
+        if node not in writers and node in lost:
+            print("Node " + str(node) + " joined again")
+            writers[node] = lost.pop(node)
+            finished -= 1
+        elif node not in writers:
+            print("Node " + str(node) + " joined")
+            writers[node] = lib_quickmode.BatchWriter(os.path.join(sys.argv[1], "node" + str(node)))
+        if data is not None:
+            writers[node].feed(data)
+            continue
+
+        writer = writers.pop(node)
+        # Its files go on where they stopped if it joins again
+        if node in gateway.lost:
+            lost[node] = writer
+        if not writer.done():
+            print("ERROR: node " + str(node) + " stopped before every file arrived")
+        print("Node " + str(node) + ": " + str(len(writer.written)) + " files received, "
+              + str(len(writer.failed)) + " with errors")
+        finished += 1
+        if senders is not None and finished >= senders:
+            break
+
+    print(str(gateway.superframes) + " superframes, guard %.1f ms, " % (gateway.guard * 1000)
+          + str(gateway.out_of_slot) + " frames out of their slot")
+
+
+if __name__ == '__main__':
+    main()
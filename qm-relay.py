@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Relay node for the Quick Mode competition of Team B
+# It has two radios: the first one receives the routed frames like a receiver,
+# the second one forwards each of them as soon as it arrives on the channel of
+# the next hop, like a sender. Arguments: the channel to listen on (0x60 next
+# to the sender, the next hop channel of the previous relay otherwise), the
+# default next hop channel, then optional node:channel routes for particular
+# nodes
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_relay
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes both radios and relays one
+    stream from the upstream channel to the next hops. """
+
+    channel = int(sys.argv[1], 0)
+    routes = {None: int(sys.argv[2], 0)}
+    for route in sys.argv[3:]:
+        node, channel = route.split(':')
+        routes[int(node, 0)] = int(channel, 0)
+
+    # Upstream radio on CE0 and GPIO 25, downstream radio on CE1 and GPIO 24
+    upstream = initialize_radios(0, 25, channel)
+    upstream.openWritingPipe(pipes[0])
+    upstream.openReadingPipe(0, pipes[1])
+
+    downstream = initialize_radios(1, 24, routes[None])
+    downstream.openWritingPipe(pipes[1])
+    downstream.openReadingPipe(0, pipes[0])
+
+    print("Relay Information")
+    upstream.printDetails()
+    downstream.printDetails()
+
+    relay = lib_relay.Relay(upstream, downstream, routes)
+    relay.run()
+
+    print(str(relay.forwarded) + " frames forwarded, " + str(relay.dropped) + " dropped")
+    for hop, stats in relay.stats.items():
+        print("Next hop on channel " + str(hop) + ": " + stats.summary())
+    for hop in relay.dead:
+        print("ERROR: the next hop on channel " + str(hop) + " stopped answering")
+
+
+if __name__ == '__main__':
+    main()
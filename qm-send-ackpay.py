@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Sender part for the Quick Mode competition of Team B
+# This version never switches the radio to RX: the frames use the auto-ack
+# of the radio and the receiver answers inside the hardware ACK (ACK payload),
+# with the next frame it expects and the gaps it has seen
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_linkstats
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, lib_quickmode.ackpay_profile(channel), spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios once and sends
+    every file given in the arguments (files or directories). """
+
+    entries = lib_quickmode.collect_files(sys.argv[1:])
+    if not entries:
+        print("ERROR: nothing to send")
+        return
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    # The hardware ACK comes back to the writing address on pipe 0
+    radio.openWritingPipe(pipes[1])
+
+    print("Sender Information")
+    radio.printDetails()
+
+    print("Sending " + str(len(entries)) + " files")
+    stats = lib_linkstats.LinkStats(radio)
+    seq = lib_quickmode.send_ackpay_stream(radio, lib_quickmode.chunked(lib_quickmode.batch_stream(entries)), stats=stats)
+    lib_quickmode.finish_ackpay_stream(radio, seq)
+
+    print("Files sent successfully")
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
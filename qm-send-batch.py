@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Sender part for the Quick Mode competition of Team B
+# This version sends several files or whole directories in one radio session:
+# a manifest with names, sizes and hashes followed by every file back-to-back
+# It uses STOP&WAIT with timeout and CRC, like the complete version, and moves
+# the data rate and PA level with the conditions of the link, hopping over
+# the channels the interference leaves free. The files share the link with a
+# control stream that carries short telemetry messages ahead of them
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_linkstats
+import spidev
+import os
+import sys
+import time
+import threading
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def report_progress(mux):
+    """ Posts a telemetry message with the progress of the files on the
+    control stream every second, and a last one once they are all sent;
+    then it closes the mux. The mux sends it ahead of the file frames
+    already waiting. """
+
+    started = time.time()
+    done = False
+    while not done:
+        done = mux.drained(lib_quickmode.MUX_BULK, 1)
+        sent = mux.sent[lib_quickmode.MUX_BULK]
+        message = "%d bytes sent, %.1f kB/s" % (sent, sent / 1000.0 / (time.time() - started))
+        mux.send(lib_quickmode.MUX_CONTROL, message.encode('utf-8'))
+    mux.close()
+
+
+def main():
+    """ This main function initializes the radios once and sends
+    every file given in the arguments (files or directories). """
+
+    entries = lib_quickmode.collect_files(sys.argv[1:])
+    if not entries:
+        print("ERROR: nothing to send")
+        return
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[1])
+    radio.openReadingPipe(0, pipes[0])
+
+    print("Sender Information")
+    radio.printDetails()
+
+    print("Sending " + str(len(entries)) + " files")
+    mux = lib_quickmode.StreamMux()
+    mux.open(lib_quickmode.MUX_CONTROL, 0)
+    mux.open(lib_quickmode.MUX_BULK, 1)
+    mux.attach(lib_quickmode.MUX_BULK, lib_quickmode.batch_stream(entries))
+    # The telemetry thread closes the mux after its last message
+    threading.Thread(target=report_progress, args=(mux,), daemon=True).start()
+
+    controller = lib_quickmode.RateController(radio)
+    blacklist = lib_quickmode.scan_channels(radio)
+    hopper = lib_quickmode.HopSequence(int.from_bytes(os.urandom(4), 'big'), blacklist)
+    stats = lib_linkstats.LinkStats(radio)
+    seq = lib_quickmode.send_stream(radio, mux, controller=controller, hopper=hopper, stats=stats)
+    lib_quickmode.finish_stream(radio, seq, stats)
+
+    print("Files sent successfully")
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
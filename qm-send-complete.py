@@ -2,18 +2,29 @@
 # -*- coding: utf-8 -*-
 #
 # Sender part for the Quick Mode competition of Team B
-# This version uses STOP&WAIT with timeout if the ACK is not received
+# This version sends bursts of frames and gets one selective ACK per burst,
+# resending only the frames that did not arrive. Zero runs and repeated
+# blocks go as short references if the receiver supports it
 # It also uses CRC to ensure packet integrity
+# The session opens with a SYN carrying the size and MD5 of the file and
+# closes with a FIN answered in one round trip
+# The encoded frames are kept in a cache, so sending the same file again
+# takes them from there instead of encoding it once more
+# With --realtime the transfer runs in real-time mode (see lib_realtime.py)
 # Date: 10/04/2019
 # Version: 1.0
 
 import RPi.GPIO as GPIO
 from lib_nrf24 import NRF24
-import time
 import spidev
 import sys
 import os
-import crc16
+import lib_quickmode
+import lib_linkstats
+import lib_dedup
+import lib_framecache
+import lib_spitrace
+import lib_realtime
 
 # Initialize GPIOs
 GPIO.setmode(GPIO.BCM)
@@ -31,156 +42,81 @@ def initialize_radios(csn, ce, channel):
     and the channel that will be used to transmit or receive the data."""
 
     radio = NRF24(GPIO, spidev.SpiDev())
-    radio.begin(csn, ce)
-    time.sleep(2)
-    radio.setRetries(15, 15)
     radio.setPayloadSize(32)
-    radio.setChannel(channel)
-
-    radio.setDataRate(NRF24.BR_250KBPS)
-    radio.setPALevel(NRF24.PA_MIN)
-    radio.setAutoAck(False)
-    radio.enableDynamicPayloads()
-    radio.enableAckPayload()
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
 
     return radio
 
 
-def num_generator(num):
-    """ We must ensure that we always send 2 bytes 
-    to control the frames."""
-
-    num = str(num)
-    if len(num) == 1:
-        return '0'+num
-    elif len(num) == 2:
-        return num
-    else:
-        print('There was a problem with the number generator')
-
-
-def ensure_crc(crc):
-    """ In final designs it was found that some text inputs
-    would generate crc lengths smaller than 5 (which is the usual one),
-    so this function ensures we always send 5 bytes through the antenna."""
-
-    crc = str(crc)
-    if len(crc) == 1:
-        return '0000'+crc
-    elif len(crc) == 2:
-        return '000'+crc
-    elif len(crc) == 3:
-        return '00'+crc
-    elif len(crc) == 4:
-        return '0'+crc
-    elif len(crc) == 5:
-        return crc
-    else:
-        print('There was a problem with the number ensure_crc')
-
-def calculate_crc(chunk):
-    """ This function calculates the CRC for the given data. """
-
-    return ensure_crc(crc16.crc16xmodem(chunk))
-
-
-def send_packet(sender, payload):
-    """ Send the packet thorugh the sender radio. """
-    sender.write(payload)
-
-
-def ack_or_timeout(receiver):
-    """ This is a blocking function that waits until
-    data has been received or until the defined timeout has passed. """
-
-    timeout_starts = time.time() 
-    while not receiver.available(pipes[0]) and (time.time() - timeout_starts) < 1:
-        time.sleep(0.01)
-
-
-def read_file(file_path):
-    """ Gets the provided file and reads its content as bytes,
-    after that, it stores everything in the variable payload_list,
-    which it returns. """
-
-    payload_list = list()
-
-    if os.path.isfile(file_path):
-        print("Loading File in: " + file_path)
-
-        with open(file_path, 'rb') as f:
-            count = 0
-            while True:
-                chunk = f.read(25) 
-                if chunk:
-                    if count == 100:
-                        count = 0
-                    num = num_generator(count)
-                    crc = calculate_crc(chunk+bytes(num.encode('utf-8')))
-                    count = count + 1
-                    payload_list.append(chunk+bytes(num.encode('utf-8'))+bytes(crc.encode('utf-8')))
-                else:
-                    break
-    else:
-        print("ERROR: file does not exist in PATH: " + file_path)
-    
-    return payload_list
-
-
 def main():
     """ This main function initializes the radios and sends
     all the data gathered from the file. """
 
+    realtime = None
+    if '--realtime' in sys.argv:
+        sys.argv.remove('--realtime')
+        realtime = lib_realtime.RealTime()
+
     radio = initialize_radios(0, 25, 0x60)
 
+    # An optional second argument records the SPI traffic for qm-trace-replay.py
+    tracer = None
+    if len(sys.argv) > 2:
+        tracer = lib_spitrace.enable_tracing(radio, lib_spitrace.ROLE_SENDER)
+
     radio.openWritingPipe(pipes[1])
     radio.openReadingPipe(0, pipes[0])
 
     print("Sender Information")
     radio.printDetails()
 
-    payload_list = read_file(sys.argv[1])
-
-    count = 0
-    while count < len(payload_list):
-        # send a packet to receiver
-        acknowledged = False
-        while not acknowledged:
-            send_packet(radio, payload_list[count])
-            print("Sent payload number: " + str(count))
-
-            # Did we get an ACK back?
-            radio.startListening()
-            ack_or_timeout(radio)
-            
-            if radio.available(pipes[0]):
-                recv_buffer = []
-                radio.read(recv_buffer, radio.getDynamicPayloadSize())
-                ack_received = bytes(recv_buffer)
-                print("ACK available")
-                if ack_received == b'1GUTACK':
-                    acknowledged = True
-                    count = count + 1
-            radio.stopListening()
-
-    while True:
-        print("Sending the FinalACK")
-        time.sleep(1)
-        send_packet(radio, b'TH1SPR0GRAMSHOULDBEOVER9999999')
-
-        # Did we get an ACK back?
-        radio.startListening()
-        ack_or_timeout(radio)
-
-        if radio.available(pipes[0]):
-            recv_buffer = []
-            radio.read(recv_buffer, radio.getDynamicPayloadSize())
-            received = bytes(recv_buffer)
-            if received == b'TH1SISTH3FINALACK':
-                break
-        radio.stopListening()
+    if not os.path.isfile(sys.argv[1]):
+        print("ERROR: file does not exist in PATH: " + sys.argv[1])
+        return
+
+    print("Loading File in: " + sys.argv[1])
+    if realtime:
+        realtime.enter()
+        print(realtime.summary())
+        monitor = lib_realtime.LatencyMonitor()
+        monitor.start(realtime)
+
+    try:
+        cache = lib_framecache.FrameCache()
+        session = lib_quickmode.Session(os.path.getsize(sys.argv[1]), cache.digest(sys.argv[1]),
+                                        window=lib_quickmode.SACK_BURST, codec=lib_quickmode.CODEC_DEDUP)
+        stats = lib_linkstats.LinkStats(radio)
+        lib_quickmode.open_session(radio, session, stats)
+        if session.error():
+            print("ERROR: the receiver rejected the file: " + session.error())
+            return
+
+        if session.codec == lib_quickmode.CODEC_DEDUP:
+            encoding = (session.codec, lib_dedup.DEDUP_BLOCK, lib_dedup.DEDUP_HISTORY)
+            chunks = lambda: lib_quickmode.chunked(lib_dedup.build_dedup(sys.argv[1]))
+        else:
+            encoding = (session.codec,)
+            chunks = lambda: lib_quickmode.chunked([lib_quickmode.mapped_file(sys.argv[1])])
+        frames = cache.frames(session.digest, encoding, chunks)
+        if cache.hits:
+            print("Frames taken from the cache")
+        seq = lib_quickmode.send_sack_frames(radio, frames, window=session.window, stats=stats)
+        if not lib_quickmode.finish_stream(radio, seq, stats):
+            print("No FIN_ACK from the receiver, it has acknowledged every frame")
+    finally:
+        if realtime:
+            monitor.stop()
+            realtime.leave()
+            print(monitor.summary())
 
     print("File sent successfully")
+
+    if tracer:
+        tracer.save(sys.argv[2])
+        print("SPI trace saved in " + sys.argv[2])
         
 
 if __name__ == '__main__':
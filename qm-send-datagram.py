@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Sender part for the Quick Mode competition of Team B
+# Latency benchmark of the datagram link: it sends count messages of size
+# bytes (reliable ones if a third argument is given) and waits for the echo
+# of qm-receive-datagram.py after each one. Half of every round trip is one
+# send-to-deliver time; their 50th, 99th and 99.9th percentiles are reported
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_datagram
+import spidev
+import sys
+import os
+import time
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+# GPIO wired to the IRQ pin of the radio, None to poll the radio instead
+IRQ_PIN = None
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios once and measures
+    the latency of count messages. """
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    reliable = len(sys.argv) > 3
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[1])
+    radio.openReadingPipe(0, pipes[0])
+
+    link = lib_datagram.DatagramLink(radio, IRQ_PIN)
+    latencies = list()
+    lost = 0
+    for i in range(count):
+        message = os.urandom(size)
+        started = time.perf_counter()
+        link.send_message(message, reliable)
+        echo = link.recv_message(1.0)
+        # Echoes of earlier messages that arrived late
+        while echo is not None and echo != message:
+            echo = link.recv_message(1.0)
+        if echo is None:
+            lost += 1
+            continue
+        latencies.append((time.perf_counter() - started) / 2)
+    link.close()
+
+    if not latencies:
+        print("ERROR: no echo received")
+        return
+    p50, p99, p999 = lib_datagram.percentiles(latencies)
+    print(str(len(latencies)) + " messages of " + str(size) + " bytes, " + str(lost) + " lost")
+    print("Send to deliver: p50 %.2f ms, p99 %.2f ms, p99.9 %.2f ms" % (p50 * 1000, p99 * 1000, p999 * 1000))
+
+
+if __name__ == '__main__':
+    main()
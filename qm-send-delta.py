@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Sender part for the Quick Mode competition of Team B
+# This version updates a file the receiver already has (rsync-style delta):
+# the receiver first sends the block signatures of its copy, and only the
+# changed bytes plus references to the unchanged blocks are sent back
+# It uses STOP&WAIT with timeout and CRC, like the complete version
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_delta
+import spidev
+import sys
+import os
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios, receives the
+    signature of the receiver's copy and sends the delta of the file. """
+
+    if not os.path.isfile(sys.argv[1]):
+        print("ERROR: file does not exist in PATH: " + sys.argv[1])
+        return
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[1])
+    radio.openReadingPipe(0, pipes[0])
+
+    print("Sender Information")
+    radio.printDetails()
+
+    print("Waiting for the signature of the receiver's copy")
+    signature = b''.join(lib_quickmode.receive_stream(radio))
+
+    delta = b''.join(lib_delta.build_delta(sys.argv[1], signature))
+    print("Sending delta: " + str(len(delta)) + " bytes for a file of " + str(os.path.getsize(sys.argv[1])))
+    seq = lib_quickmode.send_stream(radio, lib_quickmode.chunked([delta]))
+    lib_quickmode.finish_stream(radio, seq)
+
+    print("File sent successfully")
+
+
+if __name__ == '__main__':
+    main()
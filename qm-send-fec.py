@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Sender part for the Quick Mode competition of Team B
+# This version uses hybrid ARQ: the files go out in blocks of data frames
+# followed by parity frames, so the receiver repairs small losses by itself.
+# The parity follows the measured loss of the link and only what it could
+# not repair is sent again, when the receiver asks for it
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_linkstats
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios once and sends
+    every file given in the arguments (files or directories). """
+
+    entries = lib_quickmode.collect_files(sys.argv[1:])
+    if not entries:
+        print("ERROR: nothing to send")
+        return
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[1])
+    radio.openReadingPipe(0, pipes[0])
+
+    print("Sender Information")
+    radio.printDetails()
+
+    print("Sending " + str(len(entries)) + " files")
+    stats = lib_linkstats.LinkStats(radio, lib_quickmode.FEC_INITIAL_LOSS)
+    seq = lib_quickmode.send_fec_stream(radio, lib_quickmode.batch_stream(entries), stats=stats)
+    lib_quickmode.finish_stream(radio, seq, stats)
+
+    print("Files sent successfully")
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Sender part for the Quick Mode competition of Team B
+# This version sends one file with STOP&WAIT like the complete version, but
+# the file is read and framed (CRC included) by worker processes on the other
+# cores, so the radio loop never waits for that work. An optional second
+# argument sets the number of workers
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_linkstats
+import lib_pipeline
+import spidev
+import sys
+import os
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios, opens the session
+    and sends the frames the workers build from the file. """
+
+    if not os.path.isfile(sys.argv[1]):
+        print("ERROR: file does not exist in PATH: " + sys.argv[1])
+        return
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else lib_pipeline.default_workers()
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[1])
+    radio.openReadingPipe(0, pipes[0])
+
+    print("Sender Information")
+    radio.printDetails()
+
+    session = lib_quickmode.Session(os.path.getsize(sys.argv[1]), lib_quickmode.file_digest(sys.argv[1]))
+    stats = lib_linkstats.LinkStats(radio)
+    lib_quickmode.open_session(radio, session, stats)
+    if session.error():
+        print("ERROR: the receiver rejected the file: " + session.error())
+        return
+
+    print("Sending with " + str(workers) + " workers")
+    seq = lib_pipeline.send_pipeline(radio, sys.argv[1], workers, stats)
+    lib_quickmode.finish_stream(radio, seq, stats)
+
+    print("File sent successfully")
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -31,17 +31,11 @@ def initialize_radios(csn, ce, channel):
     and the channel that will be used to transmit or receive the data."""
 
     radio = NRF24(GPIO, spidev.SpiDev())
-    radio.begin(csn, ce)
-    time.sleep(2)
-    radio.setRetries(15, 15)
     radio.setPayloadSize(32)
-    radio.setChannel(channel)
-
-    radio.setDataRate(NRF24.BR_250KBPS)
-    radio.setPALevel(NRF24.PA_MIN)
-    radio.setAutoAck(False)
-    radio.enableDynamicPayloads()
-    radio.enableAckPayload()
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
 
     return radio
 
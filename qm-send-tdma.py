@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Sender part for the Quick Mode competition of Team B
+# This version shares the gateway (qm-receive-tdma.py) with other senders:
+# it only transmits in the slot the gateway gives it in its beacons, so the
+# frames of the different senders never collide. Arguments: the node number
+# of this sender (1 to 255) and the files or directories to send
+# Date: 19/10/2026
+# Version: 1.0
+
+import RPi.GPIO as GPIO
+from lib_nrf24 import NRF24
+import lib_quickmode
+import lib_linkstats
+import lib_tdma
+import spidev
+import sys
+
+# Initialize GPIOs
+GPIO.setmode(GPIO.BCM)
+GPIO.setwarnings(False)
+
+# Define the pipes that will be used to send the data from one transceiver to the other
+pipes = [[0xe7, 0xe7, 0xe7, 0xe7, 0xe7], [0xc2, 0xc2, 0xc2, 0xc2, 0xc2]]
+
+
+def initialize_radios(csn, ce, channel):
+    """ This function initializes the radios, each
+    radio being the NRF24 transceivers.
+
+    It gets 3 arguments, csn = Chip Select, ce = Chip Enable
+    and the channel that will be used to transmit or receive the data."""
+
+    radio = NRF24(GPIO, spidev.SpiDev())
+    radio.setPayloadSize(32)
+    radio.begin(csn, ce, NRF24.makeProfile(channel=channel, data_rate=NRF24.BR_250KBPS, pa_level=NRF24.PA_MIN,
+                                           retries=(15, 15), auto_ack=False,
+                                           dynamic_payloads=True, ack_payload=True),
+                spi_speed=8000000)
+
+    return radio
+
+
+def main():
+    """ This main function initializes the radios and sends every
+    file given in the arguments in the slots of this node. """
+
+    node = int(sys.argv[1], 0)
+    entries = lib_quickmode.collect_files(sys.argv[2:])
+    if not entries:
+        print("ERROR: nothing to send")
+        return
+
+    radio = initialize_radios(0, 25, 0x60)
+
+    radio.openWritingPipe(pipes[1])
+    radio.openReadingPipe(0, pipes[0])
+
+    print("Sender Information")
+    radio.printDetails()
+
+    print("Sending " + str(len(entries)) + " files as node " + str(node))
+    chunks = lib_quickmode.chunked(lib_quickmode.batch_stream(entries), lib_tdma.TDMA_DATA_SIZE)
+    stats = lib_linkstats.LinkStats(radio)
+    if lib_tdma.send_tdma_stream(radio, chunks, node, stats):
+        print("Files sent successfully")
+    else:
+        print("ERROR: no beacon from the gateway")
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
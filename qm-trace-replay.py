@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Offline analysis of the SPI traces recorded with lib_spitrace
+# It reports, per logical radio operation, how often it ran, how long it took
+# on the rig and how many SPI transactions it cost, then replays the same
+# transactions against a fake spidev to measure the host side cost alone.
+# Usage: qm-trace-replay.py trace_file
+# Date: 19/10/2026
+# Version: 1.0
+
+import lib_spitrace
+import time
+import sys
+
+
+def split_operations(records):
+    """ Groups the SPI transactions of the trace by the logical operation
+    that issued them. It returns a list of (operation, duration, length,
+    transfers), with operation None for transfers outside any marker. """
+
+    operations = list()
+    current = None
+    for start, duration, opcode, reg, length, kind in records:
+        if kind == lib_spitrace.KIND_OP_BEGIN:
+            current = list()
+        elif kind == lib_spitrace.KIND_OP_END:
+            operations.append((lib_spitrace.OPERATIONS[opcode], duration, length, current or list()))
+            current = None
+        elif current is not None:
+            current.append((opcode, length))
+        else:
+            operations.append((None, duration, 0, [(opcode, length)]))
+
+    return operations
+
+
+def replay(transfers, spi):
+    """ Issues the given transfers on spi and returns the time it took in ns. """
+
+    start = time.perf_counter_ns()
+    for opcode, length in transfers:
+        spi.xfer2([opcode] + [0xff] * (length - 1))
+
+    return time.perf_counter_ns() - start
+
+
+def main():
+    """ This main function loads the trace and prints the report. """
+
+    role, records = lib_spitrace.load_trace(sys.argv[1])
+    operations = split_operations(records)
+    print("Loaded " + str(len(records)) + " records of the " + lib_spitrace.ROLES[role])
+
+    spi = lib_spitrace.FakeSpiDev()
+    stats = dict()
+    for name, duration, length, transfers in operations:
+        entry = stats.setdefault(name or 'other', [0, 0, 0, 0, 0])
+        entry[0] += 1
+        entry[1] += duration
+        entry[2] += len(transfers)
+        entry[3] += length
+        entry[4] += replay(transfers, spi)
+
+    print("Operation\t  Calls\t   Rig us/call\tXfers/call\tReplay us/call")
+    for name, (calls, duration, transfers, length, replayed) in sorted(stats.items()):
+        print("%-14s\t%7d\t%14.1f\t%10.2f\t%14.1f" % (name, calls, duration / 1000.0 / calls,
+                                                     transfers / float(calls), replayed / 1000.0 / calls))
+
+    total_transfers = sum(entry[2] for entry in stats.values())
+    # The receiver delivers what it reads, the sender what it writes (it also reads ACK payloads)
+    delivered = stats.get('read' if role == lib_spitrace.ROLE_RECEIVER else 'write', [0, 0, 0, 0, 0])[3]
+    print("")
+    print("SPI transactions: " + str(total_transfers))
+    print("Payload bytes delivered: " + str(delivered))
+    if delivered:
+        print("SPI transactions per delivered byte: %.3f" % (total_transfers / float(delivered)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Tests of lib_timing: the CE pulses the radio driver generates, recorded
+# with a fake GPIO module, must last at least the 10us of the datasheet.
+# Run with: python -m pytest tests
+# Date: 19/10/2026
+# Version: 1.0
+
+import os
+import sys
+import time
+import importlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import lib_timing
+
+
+def test_import_does_not_calibrate():
+    importlib.reload(lib_timing)
+    assert lib_timing._sleep_overhead_ns is None
+
+
+def test_first_delay_calibrates():
+    importlib.reload(lib_timing)
+    lib_timing.delay_us(10)
+    assert lib_timing._sleep_overhead_ns is not None
+
+
+def test_delay_is_never_short():
+    for us in (10, 130, 1500):
+        start = time.perf_counter_ns()
+        lib_timing.delay_us(us)
+        assert time.perf_counter_ns() - start >= us * 1000
+
+
+def test_ce_pulse_widths():
+    shortest, median, longest = lib_timing.check_pulse_widths(pulses=100)
+    assert shortest >= 10
+
+
+def test_pulse_recorder_widths():
+    gpio = lib_timing.PulseRecorder()
+    gpio.output(25, gpio.HIGH)
+    lib_timing.delay_us(50)
+    gpio.output(25, gpio.LOW)
+    gpio.output(24, gpio.HIGH)
+    widths = gpio.pulse_widths(25)
+    assert len(widths) == 1 and widths[0] >= 50